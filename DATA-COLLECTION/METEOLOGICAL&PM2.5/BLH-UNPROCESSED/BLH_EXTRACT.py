@@ -1,8 +1,17 @@
+import os
+import sys
 import xarray as xr
 import pandas as pd
 
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from pipeline_metrics import StageMetrics, file_size
+
+metrics = StageMetrics("blh_extraction")
+
 # Open dataset
 ds = xr.open_dataset("data.nc")
+metrics.add("bytes_read", file_size("data.nc"), stage="extract")
 
 # Keep only BLH
 blh = ds["blh"]
@@ -17,13 +26,20 @@ stations = [
 ]
 
 # Extract BLH for each station and save separately
-for name, lat, lon in stations:
-    # Select nearest grid point
-    station_blh = blh.sel(latitude=lat, longitude=lon, method="nearest")
-    df_station = station_blh.to_dataframe().reset_index()
-    df_station["Station"] = name
-
-    # Save each station's BLH as a separate CSV
-    filename = f"BLH_{name}.csv"
-    df_station.to_csv(filename, index=False)
-    print(f"✅ Saved {filename}")
+with metrics.stage("extract"):
+    for name, lat, lon in stations:
+        # Select nearest grid point
+        station_blh = blh.sel(latitude=lat, longitude=lon, method="nearest")
+        df_station = station_blh.to_dataframe().reset_index()
+        df_station["Station"] = name
+
+        # Save each station's BLH as a separate CSV
+        filename = f"BLH_{name}.csv"
+        df_station.to_csv(filename, index=False)
+        metrics.add("rows", len(df_station))
+        metrics.add("bytes_written", file_size(filename))
+        print(f"✅ Saved {filename}")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
@@ -0,0 +1,59 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from pipeline_metrics import StageMetrics, file_size
+from era5 import open_era5, field_variables, interpolate_at
+
+parser = argparse.ArgumentParser(description="Adds ERA5 variables, interpolated to each scan time, to the station satellite CSVs.")
+parser.add_argument("inputs", nargs="+", help="Station CSVs from allstation-data_processing.py (date, time, latitude, longitude, ...)")
+parser.add_argument("--era5", default="data.nc", help="ERA5 NetCDF or GRIB file")
+parser.add_argument("--variables", nargs="*", default=None, help="Variables to add (default: every field in the file)")
+parser.add_argument("--suffix", default="_era5", help="Output is written next to each input as <name><suffix>.csv")
+args = parser.parse_args()
+
+metrics = StageMetrics("era5_interpolation")
+
+with metrics.stage("load"):
+    ds = open_era5(args.era5)
+    variables = args.variables or field_variables(ds)
+    metrics.add("bytes_read", file_size(args.era5))
+
+    frames = []
+    for path in args.inputs:
+        df = pd.read_csv(path)
+        df["source"] = path
+        frames.append(df)
+        metrics.add("rows", len(df))
+        metrics.add("bytes_read", file_size(path))
+    samples = pd.concat(frames, ignore_index=True)
+
+with metrics.stage("interpolate"):
+    # Satellite timestamps are UTC, like ERA5
+    targets = pd.to_datetime(samples["date"] + " " + samples["time"], format="%d-%m-%Y %H:%M", errors="coerce")
+
+    groups = samples.groupby(["latitude", "longitude"], sort=False)
+    station_index = groups.ngroup().values
+    stations = groups.size().index.to_frame(index=False)
+
+    values = interpolate_at(ds, stations["latitude"].values, stations["longitude"].values,
+                            station_index, targets.values, variables)
+    for var in variables:
+        samples[var] = values[var]
+    metrics.add("rows", len(samples))
+
+with metrics.stage("write"):
+    for path, df in samples.groupby("source", sort=False):
+        filename = os.path.splitext(path)[0] + args.suffix + ".csv"
+        df.drop(columns="source").to_csv(filename, index=False)
+        metrics.add("bytes_written", file_size(filename))
+        missing = int(np.isnan(df[variables].values).any(axis=1).sum())
+        print(f"✅ Saved {filename} ({len(df)} rows, {missing} outside the ERA5 time range)")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
@@ -1,20 +1,41 @@
+import os
+import sys
 import pandas as pd
 
-# Load main dataset
-main_df = pd.read_csv("output.csv")
-main_df['From Date'] = pd.to_datetime(main_df['From Date'], format='%d-%m-%Y %H:%M', errors='coerce')
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from pipeline_metrics import StageMetrics, file_size
+from schema import read_table, memory_mb
 
-# Load BLH dataset
-blh_df = pd.read_csv("BLH_Udyogamandal_Eloor.csv")
-blh_df['time'] = pd.to_datetime(blh_df['time'], errors='coerce')
+metrics = StageMetrics("blh_merge")
 
-# Merge on standardized datetime
-merged = pd.merge(main_df, blh_df[['time', 'blh']], left_on='From Date', right_on='time', how='inner')
+with metrics.stage("load"):
+    # Load main dataset
+    main_df = read_table("output.csv", time_columns=("From Date", "To Date"), time_format='%d-%m-%Y %H:%M')
 
-# Select required columns
-final_columns = ['From Date', 'PM2.5', 'RH', 'WS', 'WD', 'AT', 'RF', 'TOT-RF', 'blh']
-final_df = merged[final_columns]
+    # Load BLH dataset
+    blh_df = read_table("BLH_Udyogamandal_Eloor.csv", time_columns=("time",))
 
-# Save result
-final_df.to_csv("merged_output.csv", index=False, na_rep="None")
-print("✅ Integration complete: Saved as merged_output.csv")
\ No newline at end of file
+    metrics.add("rows", len(main_df) + len(blh_df))
+    metrics.add("bytes_read", file_size("output.csv") + file_size("BLH_Udyogamandal_Eloor.csv"))
+    metrics.gauge("frame_mb", memory_mb(main_df) + memory_mb(blh_df))
+
+with metrics.stage("merge"):
+    # Merge on standardized datetime
+    merged = pd.merge(main_df, blh_df[['time', 'blh']], left_on='From Date', right_on='time', how='inner')
+
+    # Select required columns
+    final_columns = ['From Date', 'PM2.5', 'RH', 'WS', 'WD', 'AT', 'RF', 'TOT-RF', 'blh']
+    final_df = merged[final_columns]
+    metrics.add("rows", len(final_df))
+
+with metrics.stage("write"):
+    # Save result
+    final_df.to_csv("merged_output.csv", index=False, na_rep="None")
+    metrics.add("rows", len(final_df))
+    metrics.add("bytes_written", file_size("merged_output.csv"))
+print("✅ Integration complete: Saved as merged_output.csv")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
@@ -1,52 +1,18 @@
-import math
 import h5py
 import os
 import csv
-import re
-
-# Projection parameters (WGS84)
-a = 6378137.0
-b = 6356752.3142
-lon0 = 75.0  # central meridian
-
-x_ul = -6122571.993630046 # upper left x
-y_ul = 6413524.594094472 # upper left y
-
-dx = 3999.067272129357 # pixel size in x direction
-dy = 3999.703519859353 # pixel size in y direction
-
-nrows, ncols = 3207, 3062  # array shape
-
-ee = math.sqrt(1 - (b**2 / a**2)) # eccentricity
-
-def latandlong_to_pixels(lat, lon):
-    phi = math.radians(lat)
-    lam = math.radians(lon)
-    lam0 = math.radians(lon0)
-    x = a * (lam - lam0) # x coordinate in mercator projection
-    y = a * math.log(
-        math.tan(math.pi/4 + phi/2) *
-        ((1 - ee * math.sin(phi)) / (1 + ee * math.sin(phi)))**(ee/2)
-    ) # y coordinate in mercator projection
-    col = (x - x_ul) / dx # column
-    row = (y_ul - y) / dy # row
-    return min(max(int(row), 0), nrows - 1), min(max(int(col), 0), ncols - 1)
-
-def extract_datetime(fname):
-    match = re.search(r'_(\d{2})([A-Z]{3})(\d{4})_(\d{2})(\d{2})_', fname)
-    if match:
-        day = match.group(1)
-        month_str = match.group(2)
-        year = match.group(3)
-        hour = match.group(4)
-        minute = match.group(5)
-        months = {"JAN":"01", "FEB":"02", "MAR":"03", "APR":"04", "MAY":"05", "JUN":"06",
-                  "JUL":"07", "AUG":"08", "SEP":"09", "OCT":"10", "NOV":"11", "DEC":"12"}
-        month = months.get(month_str.upper(), "01")
-        date_fmt = f"{day}-{month}-{year}"
-        time_fmt = f"{hour}:{minute}"
-        return date_fmt, time_fmt
-    return "", ""
+import sys
+import time
+import argparse
+import numpy as np
+
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pipeline_metrics import StageMetrics, file_size
+from metrics_server import start_metrics_server, add_metrics_argument
+from insat3d import (latandlong_to_pixels, extract_datetime, granule_time, calibrate, fill_value_of, SATELLITE_COLUMNS,
+                     count_flags, cloud_flags, QC_FILL, QC_SATURATED, QC_CLOUD_BT, QC_CLOUD_VIS)
+from geometry import ANGLE_DATASETS, pixel_angles, stored_angles, angle_difference
 
 stations = [
     ("Plammoodu_Thiruvananthapuram", 8.5149093, 76.9435879),
@@ -56,104 +22,142 @@ stations = [
     ("CorporationGround_Thrissur", 10.532400, 76.215900)
 ]
 
-folder = "unprocessed-data/new_jan"
-
-for station_name, lat, lon in stations:
-    row, col = latandlong_to_pixels(lat, lon)
-    output_csv = f"{station_name}newjannew.csv"
-    with open(output_csv, "w", newline="") as csvfile:
-        header = [
-            "date", "time", "latitude", "longitude",
-            "WV_RADIANCE",
-            "VIS_ALBEDO", "VIS_RADIANCE",
-            "TIR1_TEMP", "TIR1_RADIANCE",
-            "TIR2_TEMP", "TIR2_RADIANCE",
-            "MIR_RADIANCE",
-            "SWIR_RADIANCE",
-            "SAT_AZIMUTH",
-            "SAT_ELEVATION",
-            "SUN_AZIMUTH",
-            "SUN_ELEVATION"
-        ]
-        writer = csv.writer(csvfile)
+def load_stations(path):
+    """Reads 'name,lat,lon' rows from a CSV file (header row optional)."""
+    loaded = []
+    with open(path, newline="") as f:
+        for fields in csv.reader(f):
+            if len(fields) < 3:
+                continue
+            try:
+                loaded.append((fields[0].strip(), float(fields[1]), float(fields[2])))
+            except ValueError:
+                continue  # header row
+    return loaded
+
+parser = argparse.ArgumentParser(description="Extracts INSAT-3D band values at each station from a folder of granules.")
+parser.add_argument("--folder", default="unprocessed-data/new_jan", help="Folder containing the .h5 granules")
+parser.add_argument("--stations", default="", help="CSV file with name,lat,lon rows (defaults to the built-in station list)")
+parser.add_argument("--drop-flagged", action="store_true",
+                    help="Leave out samples with any QC flag (fill, saturated or cloudy) instead of writing them")
+parser.add_argument("--angles", choices=["computed", "stored", "validate"], default="computed",
+                    help="Sun/satellite angles: computed from time and position (default), read from the granule, "
+                         "or read and compared against the computed ones")
+parser.add_argument("--angle-cache", default="", help="Folder to cache the per-pixel satellite view angles in")
+add_metrics_argument(parser)
+args = parser.parse_args()
+
+folder = args.folder
+if args.stations:
+    stations = load_stations(args.stations)
+
+metrics = StageMetrics("satellite_extraction")
+start_metrics_server(metrics, args.metrics_port)
+
+# Datasets read per granule: 6 count arrays and 9 LUTs, plus the 4 angle arrays unless they are computed
+H5_READS_PER_GRANULE = 15 if args.angles == "computed" else 19
+
+header = [
+    "date", "time", "latitude", "longitude",
+    "WV_RADIANCE",
+    "VIS_ALBEDO", "VIS_RADIANCE",
+    "TIR1_TEMP", "TIR1_RADIANCE",
+    "TIR2_TEMP", "TIR2_RADIANCE",
+    "MIR_RADIANCE",
+    "SWIR_RADIANCE",
+    "SAT_AZIMUTH",
+    "SAT_ELEVATION",
+    "SUN_AZIMUTH",
+    "SUN_ELEVATION",
+    "QC"
+]
+
+# Station pixels, and the smallest window of the disk that contains all of them
+pixels = np.array([latandlong_to_pixels(lat, lon) for _, lat, lon in stations])
+rows, cols = pixels[:, 0], pixels[:, 1]
+row0, col0 = rows.min(), cols.min()
+window = (slice(row0, rows.max() + 1), slice(col0, cols.max() + 1))
+
+def read_at_stations(dataset):
+    """Values of a (1, rows, cols) dataset at every station pixel, from one window read."""
+    return dataset[0, window[0], window[1]][rows - row0, cols - col0]
+
+qc_counts = {QC_FILL: 0, QC_SATURATED: 0, QC_CLOUD_BT: 0, QC_CLOUD_VIS: 0}
+angle_errors = {name: [] for name in ANGLE_DATASETS}
+
+with metrics.stage("extract"):
+    output_csvs = [f"{station_name}newjannew.csv" for station_name, _, _ in stations]
+    csvfiles = [open(path, "w", newline="") for path in output_csvs]
+    writers = [csv.writer(csvfile) for csvfile in csvfiles]
+    for writer in writers:
         writer.writerow(header)
-        for fname in os.listdir(folder):
-            if fname.endswith(".h5"):
-                file_path = os.path.join(folder, fname)
-                try:
-                    with h5py.File(file_path, "r") as f:
-                        # WV
-                        ds_wv = f["IMG_WV"]
-                        dsr_wv = f["IMG_WV_RADIANCE"]
-                        a_wv = ds_wv[0, row, col]
-                        value_wv = dsr_wv[a_wv]
-
-                        # VIS
-                        ds_vis = f["IMG_VIS"]
-                        dsr_vis_albedo = f["IMG_VIS_ALBEDO"]
-                        dsr_vis_radiance = f["IMG_VIS_RADIANCE"]
-                        a_vis = ds_vis[0, row, col]
-                        value_vis_albedo = dsr_vis_albedo[a_vis]
-                        value_vis_radiance = dsr_vis_radiance[a_vis]
-
-                        # TIR1
-                        ds_tir1 = f["IMG_TIR1"]
-                        dsr_tir1_temp = f["IMG_TIR1_TEMP"]
-                        dsr_tir1_radiance = f["IMG_TIR1_RADIANCE"]
-                        a_tir1 = ds_tir1[0, row, col]
-                        value_tir1_temp = dsr_tir1_temp[a_tir1]
-                        value_tir1_radiance = dsr_tir1_radiance[a_tir1]
-
-                        # TIR2
-                        ds_tir2 = f["IMG_TIR2"]
-                        dsr_tir2_temp = f["IMG_TIR2_TEMP"]
-                        dsr_tir2_radiance = f["IMG_TIR2_RADIANCE"]
-                        a_tir2 = ds_tir2[0, row, col]
-                        value_tir2_temp = dsr_tir2_temp[a_tir2]
-                        value_tir2_radiance = dsr_tir2_radiance[a_tir2]
-
-                        # MIR
-                        ds_mir = f["IMG_MIR"]
-                        dsr_mir_radiance = f["IMG_MIR_RADIANCE"]
-                        a_mir = ds_mir[0, row, col]
-                        value_mir_radiance = dsr_mir_radiance[a_mir]
-
-                        # SWIR
-                        ds_swir = f["IMG_SWIR"]
-                        dsr_swir_radiance = f["IMG_SWIR_RADIANCE"]
-                        a_swir = ds_swir[0, row, col]
-                        value_swir_radiance = dsr_swir_radiance[a_swir]
-                        
-                        #SAT_AZIMUTH
-                        ds_sat_azimuth = f["Sat_Azimuth"]
-                        value_sat_azimuth = ds_sat_azimuth[0, row, col]
-
-                        #SAT_ELEVATION
-                        ds_sat_elevation = f["Sat_Elevation"]
-                        value_sat_elevation = ds_sat_elevation[0, row, col]
-
-                        #SUN_AZIMUTH
-                        ds_sun_azimuth = f["Sun_Azimuth"]
-                        value_sun_azimuth = ds_sun_azimuth[0, row, col]
-
-                        #SUN_ELEVATION
-                        ds_sun_elevation = f["Sun_Elevation"]
-                        value_sun_elevation = ds_sun_elevation[0, row, col]
-
-                        date_str, time_str = extract_datetime(fname)
-                        row_data = [
-                            date_str, time_str, lat, lon,
-                            value_wv,
-                            value_vis_albedo, value_vis_radiance,
-                            value_tir1_temp, value_tir1_radiance,
-                            value_tir2_temp, value_tir2_radiance,
-                            value_mir_radiance,
-                            value_swir_radiance,
-                            value_sat_azimuth,
-                            value_sat_elevation,
-                            value_sun_azimuth,
-                            value_sun_elevation
-                        ]
-                        writer.writerow(row_data)
-                except Exception as e:
-                    print(f"Error processing {fname} for {station_name}: {e}")
\ No newline at end of file
+
+    granules = [fname for fname in os.listdir(folder) if fname.endswith(".h5")]
+    for done, fname in enumerate(granules):
+        metrics.gauge("queue_depth", len(granules) - done)
+        file_path = os.path.join(folder, fname)
+        granule_start = time.perf_counter()
+        try:
+            with h5py.File(file_path, "r") as f:
+                metrics.add("h5_open")
+                metrics.add("granules")
+
+                # Raw counts of each band at all stations, flagged for fill / saturation
+                counts, qc = {}, np.zeros(len(stations), dtype=np.uint8)
+                for count_name, lut_name in SATELLITE_COLUMNS.values():
+                    if count_name not in counts:
+                        counts[count_name] = read_at_stations(f[count_name])
+                        qc |= count_flags(counts[count_name], len(f[lut_name]), fill_value_of(f[count_name]))
+
+                values = {column: calibrate(counts[count_name], f[lut_name][()], fill_value_of(f[count_name]))
+                          for column, (count_name, lut_name) in SATELLITE_COLUMNS.items()}
+                qc |= cloud_flags(values["TIR1_TEMP"], values["TIR2_TEMP"], values["VIS_ALBEDO"])
+
+                if args.angles != "computed":
+                    angles = {name: stored_angles(f[name], read_at_stations(f[name])) for name in ANGLE_DATASETS}
+                metrics.add("h5_read", H5_READS_PER_GRANULE)
+
+            ts = granule_time(fname)
+            if args.angles != "stored":
+                computed = pixel_angles(ts or np.datetime64("NaT"), rows, cols, args.angle_cache or None)
+                if args.angles == "computed":
+                    angles = computed
+                else:
+                    for name in ANGLE_DATASETS:
+                        angle_errors[name].append(angle_difference(computed[name], angles[name], name))
+
+            date_str, time_str = extract_datetime(fname)
+            for i, (station_name, lat, lon) in enumerate(stations):
+                for bit in qc_counts:
+                    qc_counts[bit] += bool(qc[i] & bit)
+                if args.drop_flagged and qc[i]:
+                    metrics.add("rows_rejected")
+                    continue
+                row_data = [date_str, time_str, lat, lon]
+                row_data += [values[column][i] for column in header[4:13]]
+                row_data += [angles[name][i] for name in ANGLE_DATASETS]
+                row_data.append(int(qc[i]))
+                writers[i].writerow(row_data)
+                metrics.add("rows")
+            metrics.observe("granule", time.perf_counter() - granule_start)
+        except Exception as e:
+            print(f"Error processing {fname}: {e}")
+    metrics.gauge("queue_depth", 0)
+
+    for csvfile, output_csv in zip(csvfiles, output_csvs):
+        csvfile.close()
+        metrics.add("bytes_written", file_size(output_csv))
+
+print(f"✅ QC flags: {qc_counts[QC_FILL]} fill, {qc_counts[QC_SATURATED]} saturated, "
+      f"{qc_counts[QC_CLOUD_BT]} cloudy (BT), {qc_counts[QC_CLOUD_VIS]} cloudy (VIS) samples"
+      + (" - dropped" if args.drop_flagged else ""))
+
+if args.angles == "validate":
+    print("Computed vs stored angles (|difference| in degrees, over all samples):")
+    for name, errors in angle_errors.items():
+        errors = np.concatenate(errors) if errors else np.array([np.nan])
+        print(f"  {name:<14} mean {np.nanmean(errors):8.3f}   max {np.nanmax(errors):8.3f}")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
@@ -0,0 +1,131 @@
+"""
+Sun and satellite viewing geometry for INSAT-3D/3DR imager pixels.
+
+The four angle datasets of a granule (Sun_Azimuth, Sun_Elevation, Sat_Azimuth,
+Sat_Elevation) are full-disk arrays, but they carry little information: the
+satellite angles never change for a pixel of a geostationary imager, and the
+sun angles follow from the scan time and the pixel's lat/lon. Both are
+computed here, vectorized over pixels and/or times. Angles are in degrees,
+azimuths clockwise from north in [0, 360).
+"""
+import os
+import hashlib
+
+import numpy as np
+
+from insat3d import a, b, pixel_latitudes, pixel_longitudes
+
+# 3RIMG granules come from INSAT-3DR, parked at 74 E
+SATELLITE_LON = 74.0
+GEO_RADIUS = 42164000.0  # m from the Earth's centre
+
+ANGLE_DATASETS = ["Sat_Azimuth", "Sat_Elevation", "Sun_Azimuth", "Sun_Elevation"]
+
+J2000 = np.datetime64("2000-01-01T12:00:00")
+
+
+def solar_angles(times, lats, lons):
+    """
+    Sun (azimuth, elevation) for UTC 'times' (datetime / datetime64, scalar or array)
+    at 'lats', 'lons'; inputs broadcast against each other.
+    Low-precision Astronomical Almanac formulas, good to ~0.01 deg until 2050.
+    """
+    t = np.asarray(times, dtype="datetime64[s]")
+    d = (t - J2000) / np.timedelta64(1, "D")
+
+    g = np.radians(357.529 + 0.98560028 * d)  # mean anomaly
+    q = 280.459 + 0.98564736 * d  # mean longitude
+    ecl_lon = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+
+    right_ascension = np.arctan2(np.cos(obliquity) * np.sin(ecl_lon), np.cos(ecl_lon))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecl_lon))
+    gmst = np.radians(((18.697374558 + 24.06570982441908 * d) % 24) * 15)
+
+    phi = np.radians(lats)
+    hour_angle = gmst + np.radians(lons) - right_ascension
+
+    elevation = np.arcsin(np.sin(phi) * np.sin(declination)
+                          + np.cos(phi) * np.cos(declination) * np.cos(hour_angle))
+    azimuth = np.arctan2(-np.sin(hour_angle),
+                         np.cos(phi) * np.tan(declination) - np.sin(phi) * np.cos(hour_angle))
+    return np.degrees(azimuth) % 360, np.degrees(elevation)
+
+
+def satellite_angles(lats, lons, sat_lon=SATELLITE_LON):
+    """Geostationary satellite (azimuth, elevation) as seen from 'lats', 'lons' on the WGS84 ellipsoid."""
+    phi = np.radians(np.asarray(lats, dtype=np.float64))
+    lam = np.radians(np.asarray(lons, dtype=np.float64))
+    sat_lam = np.radians(sat_lon)
+
+    # Ground point in Earth-centred coordinates
+    e2 = 1 - b ** 2 / a ** 2
+    n = a / np.sqrt(1 - e2 * np.sin(phi) ** 2)
+    px, py, pz = n * np.cos(phi) * np.cos(lam), n * np.cos(phi) * np.sin(lam), n * (1 - e2) * np.sin(phi)
+
+    # Line of sight to the satellite, projected on the local east / north / up axes
+    vx, vy, vz = GEO_RADIUS * np.cos(sat_lam) - px, GEO_RADIUS * np.sin(sat_lam) - py, -pz
+    east = -np.sin(lam) * vx + np.cos(lam) * vy
+    north = -np.sin(phi) * np.cos(lam) * vx - np.sin(phi) * np.sin(lam) * vy + np.cos(phi) * vz
+    up = np.cos(phi) * np.cos(lam) * vx + np.cos(phi) * np.sin(lam) * vy + np.sin(phi) * vz
+
+    elevation = np.arcsin(up / np.sqrt(vx ** 2 + vy ** 2 + vz ** 2))
+    return np.degrees(np.arctan2(east, north)) % 360, np.degrees(elevation)
+
+
+_view_cache = {}
+
+
+def pixel_view_angles(rows, cols, cache_dir=None, sat_lon=SATELLITE_LON):
+    """
+    Satellite (azimuth, elevation) at the centres of pixels (rows[i], cols[i]).
+    Computed once per pixel set and kept in memory, and in 'cache_dir' (.npz) if given.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    key = hashlib.sha1(rows.tobytes() + cols.tobytes() + str(sat_lon).encode()).hexdigest()[:16]
+    if key in _view_cache:
+        return _view_cache[key]
+
+    path = os.path.join(cache_dir, f"view_angles_{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path) as cached:
+            angles = cached["azimuth"], cached["elevation"]
+    else:
+        angles = satellite_angles(pixel_latitudes(rows), pixel_longitudes(cols), sat_lon)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(path, azimuth=angles[0], elevation=angles[1])
+    _view_cache[key] = angles
+    return angles
+
+
+def pixel_angles(ts, rows, cols, cache_dir=None):
+    """All four angles at the centres of pixels (rows[i], cols[i]) for scan time 'ts', keyed like the datasets."""
+    sat_azimuth, sat_elevation = pixel_view_angles(rows, cols, cache_dir)
+    sun_azimuth, sun_elevation = solar_angles(ts, pixel_latitudes(rows), pixel_longitudes(cols))
+    angles = {"Sat_Azimuth": sat_azimuth, "Sat_Elevation": sat_elevation,
+              "Sun_Azimuth": sun_azimuth, "Sun_Elevation": sun_elevation}
+    return {name: np.asarray(values, dtype=np.float32) for name, values in angles.items()}
+
+
+def stored_angles(dataset, values):
+    """Applies a stored angle dataset's scale_factor / add_offset / _FillValue to values read from it."""
+    values = np.asarray(values)
+    attrs = dataset.attrs
+    if not any(k in attrs for k in ("scale_factor", "add_offset", "_FillValue")):
+        return values  # already degrees
+    scale = float(np.ravel(attrs.get("scale_factor", 1.0))[0])
+    offset = float(np.ravel(attrs.get("add_offset", 0.0))[0])
+    scaled = (values * scale + offset).astype(np.float32)
+    if "_FillValue" in attrs:
+        scaled[values == np.ravel(attrs["_FillValue"])[0]] = np.nan
+    return scaled
+
+
+def angle_difference(computed, stored, name):
+    """Absolute difference in degrees; azimuths wrap around 360."""
+    diff = np.abs(np.asarray(computed) - np.asarray(stored))
+    if name.endswith("Azimuth"):
+        diff = np.minimum(diff, 360 - diff)
+    return diff
@@ -0,0 +1,150 @@
+import math
+import re
+from datetime import datetime
+
+import numpy as np
+
+# Projection parameters (WGS84)
+a = 6378137.0
+b = 6356752.3142
+lon0 = 75.0  # central meridian
+
+x_ul = -6122571.993630046 # upper left x
+y_ul = 6413524.594094472 # upper left y
+
+dx = 3999.067272129357 # pixel size in x direction
+dy = 3999.703519859353 # pixel size in y direction
+
+nrows, ncols = 3207, 3062  # array shape
+
+ee = math.sqrt(1 - (b**2 / a**2)) # eccentricity
+
+# Extracted column -> (count dataset, LUT dataset)
+SATELLITE_COLUMNS = {
+    "WV_RADIANCE": ("IMG_WV", "IMG_WV_RADIANCE"),
+    "VIS_ALBEDO": ("IMG_VIS", "IMG_VIS_ALBEDO"),
+    "VIS_RADIANCE": ("IMG_VIS", "IMG_VIS_RADIANCE"),
+    "TIR1_TEMP": ("IMG_TIR1", "IMG_TIR1_TEMP"),
+    "TIR1_RADIANCE": ("IMG_TIR1", "IMG_TIR1_RADIANCE"),
+    "TIR2_TEMP": ("IMG_TIR2", "IMG_TIR2_TEMP"),
+    "TIR2_RADIANCE": ("IMG_TIR2", "IMG_TIR2_RADIANCE"),
+    "MIR_RADIANCE": ("IMG_MIR", "IMG_MIR_RADIANCE"),
+    "SWIR_RADIANCE": ("IMG_SWIR", "IMG_SWIR_RADIANCE"),
+}
+
+# Kerala (lat_min, lat_max, lon_min, lon_max)
+KERALA_BBOX = (8.0, 13.0, 74.8, 77.5)
+
+# QC bitmask (0 = usable sample)
+QC_FILL = 1  # fill / out-of-range count in any band
+QC_SATURATED = 2  # count at the top of a band's range
+QC_CLOUD_BT = 4  # cold TIR1/TIR2 brightness temperature (cloud top)
+QC_CLOUD_VIS = 8  # bright VIS albedo (daytime cloud)
+
+CLOUD_BT_K = 265.0  # tropical cloud tops are colder than this, clear land/sea are warmer
+CLOUD_ALBEDO = 40.0  # percent; clear land and sea stay well below
+
+
+def latandlong_to_pixels(lat, lon):
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    lam0 = math.radians(lon0)
+    x = a * (lam - lam0) # x coordinate in mercator projection
+    y = a * math.log(
+        math.tan(math.pi/4 + phi/2) *
+        ((1 - ee * math.sin(phi)) / (1 + ee * math.sin(phi)))**(ee/2)
+    ) # y coordinate in mercator projection
+    col = (x - x_ul) / dx # column
+    row = (y_ul - y) / dy # row
+    return min(max(int(row), 0), nrows - 1), min(max(int(col), 0), ncols - 1)
+
+def pixel_latitudes(rows):
+    """Latitude of the centre of each pixel row (inverse ellipsoidal Mercator, vectorized)."""
+    y = y_ul - (np.asarray(rows, dtype=np.float64) + 0.5) * dy
+    t = np.exp(-y / a)
+    phi = np.pi / 2 - 2 * np.arctan(t)
+    for _ in range(6):  # converges to < 1e-10 rad in a few iterations
+        es = ee * np.sin(phi)
+        phi = np.pi / 2 - 2 * np.arctan(t * ((1 - es) / (1 + es)) ** (ee / 2))
+    return np.degrees(phi)
+
+def pixel_longitudes(cols):
+    """Longitude of the centre of each pixel column."""
+    x = x_ul + (np.asarray(cols, dtype=np.float64) + 0.5) * dx
+    return lon0 + np.degrees(x / a)
+
+def bbox_to_window(bbox):
+    """(lat_min, lat_max, lon_min, lon_max) -> (row0, row1, col0, col1), end-exclusive."""
+    lat_min, lat_max, lon_min, lon_max = bbox
+    row0, col0 = latandlong_to_pixels(lat_max, lon_min)
+    row1, col1 = latandlong_to_pixels(lat_min, lon_max)
+    return row0, row1 + 1, col0, col1 + 1
+
+def extract_datetime(fname):
+    match = re.search(r'_(\d{2})([A-Z]{3})(\d{4})_(\d{2})(\d{2})_', fname)
+    if match:
+        day = match.group(1)
+        month_str = match.group(2)
+        year = match.group(3)
+        hour = match.group(4)
+        minute = match.group(5)
+        months = {"JAN":"01", "FEB":"02", "MAR":"03", "APR":"04", "MAY":"05", "JUN":"06",
+                  "JUL":"07", "AUG":"08", "SEP":"09", "OCT":"10", "NOV":"11", "DEC":"12"}
+        month = months.get(month_str.upper(), "01")
+        date_fmt = f"{day}-{month}-{year}"
+        time_fmt = f"{hour}:{minute}"
+        return date_fmt, time_fmt
+    return "", ""
+
+def granule_time(fname):
+    """Scan time of a granule as a datetime (None if the filename has no timestamp)."""
+    date_str, time_str = extract_datetime(fname)
+    if not date_str:
+        return None
+    return datetime.strptime(f"{date_str} {time_str}", "%d-%m-%Y %H:%M")
+
+def calibrate(counts, lut, fill_value=None):
+    """Looks raw counts up in a LUT; fill and out-of-range counts become NaN."""
+    lut = np.asarray(lut, dtype=np.float32)
+    counts = np.asarray(counts)
+    invalid = counts >= len(lut)
+    if fill_value is not None:
+        invalid |= counts == fill_value
+    values = lut[np.where(invalid, 0, counts)]
+    values[invalid] = np.nan
+    return values
+
+def fill_value_of(dataset):
+    fill = dataset.attrs.get("_FillValue")
+    if fill is None:
+        return None
+    return np.asarray(fill).ravel()[0]
+
+def count_flags(counts, lut_size, fill_value=None):
+    """QC_FILL / QC_SATURATED bits for the raw counts of one band."""
+    counts = np.asarray(counts)
+    flags = np.zeros(counts.shape, dtype=np.uint8)
+    fill = counts >= lut_size
+    if fill_value is not None:
+        fill |= counts == fill_value
+    # The fill value usually takes the last count, so saturation is the one below it
+    top = lut_size - 2 if fill_value == lut_size - 1 else lut_size - 1
+    flags[fill] |= QC_FILL
+    flags[~fill & (counts >= top)] |= QC_SATURATED
+    return flags
+
+def cloud_flags(tir1_temp, tir2_temp, vis_albedo):
+    """QC_CLOUD_BT / QC_CLOUD_VIS bits from calibrated values (NaN never counts as cloudy)."""
+    tir1_temp = np.asarray(tir1_temp)
+    flags = np.zeros(tir1_temp.shape, dtype=np.uint8)
+    with np.errstate(invalid="ignore"):
+        flags[(tir1_temp < CLOUD_BT_K) | (np.asarray(tir2_temp) < CLOUD_BT_K)] |= QC_CLOUD_BT
+        flags[np.asarray(vis_albedo) > CLOUD_ALBEDO] |= QC_CLOUD_VIS
+    return flags
+
+def read_calibrated(f, column, window):
+    """Reads one extracted column (e.g. 'TIR1_TEMP') for a (row0, row1, col0, col1) window of an open granule."""
+    count_name, lut_name = SATELLITE_COLUMNS[column]
+    row0, row1, col0, col1 = window
+    counts = f[count_name][0, row0:row1, col0:col1]
+    return calibrate(counts, f[lut_name][()], fill_value_of(f[count_name]))
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+# Entry statuses; anything other than DONE is retried on the next run
+DONE = "done"
+FAILED = "failed"
+
+
+class DownloadPlan:
+    """
+    Local cache of the full search result set for one query, with a status per entry.
+
+    Two files per query in 'plan_dir':
+      <datasetId>_<hash>.json   -> query, search totals, whether every page has been fetched
+      <datasetId>_<hash>.jsonl  -> append-only log of entries (one line per search result)
+                                   and status changes, so progress survives crashes
+    """
+
+    def __init__(self, plan_dir, query):
+        self.query = dict(query)
+        key = hashlib.sha1(json.dumps(self.query, sort_keys=True).encode()).hexdigest()[:12]
+        name = f"{self.query.get('datasetId', 'dataset')}_{key}"
+        self.plan_dir = plan_dir
+        self.path = os.path.join(plan_dir, name + ".json")
+        self.log_path = os.path.join(plan_dir, name + ".jsonl")
+
+        self.meta = {}
+        self.complete = False
+        self.entries = []
+        self.ids = set()
+        self.status = {}
+        self._load()
+
+    # ----------------------------------------------------------- storage ----
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                header = json.load(f)
+        except (OSError, ValueError):
+            print(f"[WARNING] Download Plan '{self.path}' is Unreadable. Searching Again..")
+            return
+        if header.get("query") != self.query:
+            return
+
+        self.meta = header.get("meta", {})
+        self.complete = header.get("complete", False)
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Line torn by a crash while writing
+                    if "entry" in record:
+                        self._add_entry(record["entry"])
+                    elif "status" in record:
+                        self.status[record["id"]] = record["status"]
+
+    def _save_header(self):
+        os.makedirs(self.plan_dir, exist_ok=True)
+        header = {
+            "query": self.query,
+            "meta": self.meta,
+            "complete": self.complete,
+            "entries": len(self.entries),
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _append(self, records):
+        os.makedirs(self.plan_dir, exist_ok=True)
+        with open(self.log_path, "a") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+
+    def reset(self):
+        for path in (self.path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.meta, self.complete = {}, False
+        self.entries, self.ids, self.status = [], set(), {}
+
+    # ----------------------------------------------------------- entries ----
+
+    def _add_entry(self, entry):
+        if entry["id"] in self.ids:
+            return False
+        self.ids.add(entry["id"])
+        self.entries.append(entry)
+        return True
+
+    def set_totals(self, total_results, total_size_mb, items_per_page):
+        self.meta.update({"totalResults": total_results, "totalSizeMB": total_size_mb,
+                          "itemsPerPage": items_per_page})
+        self._save_header()
+
+    def add_page(self, items):
+        """Adds the entries of one search page; returns how many were new."""
+        new = []
+        for item in items:
+            entry = {"id": item["id"], "identifier": item["identifier"], "updated": item.get("updated")}
+            if self._add_entry(entry):
+                new.append({"entry": entry})
+        if new:
+            self._append(new)
+        self._save_header()
+        return len(new)
+
+    def mark_complete(self):
+        self.complete = True
+        self._save_header()
+
+    def mark(self, record_id, status):
+        self.status[record_id] = status
+        self._append([{"id": record_id, "status": status}])
+
+    @property
+    def next_start_index(self):
+        return len(self.entries) + 1
+
+    def pending(self):
+        """(position, entry) of every entry not downloaded yet, in search order."""
+        return [(i, e) for i, e in enumerate(self.entries) if self.status.get(e["id"]) != DONE]
+
+    def done_count(self):
+        return sum(1 for e in self.entries if self.status.get(e["id"]) == DONE)
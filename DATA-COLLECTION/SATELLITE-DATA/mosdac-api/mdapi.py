@@ -6,9 +6,10 @@ import glob
 import time
 import logging
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import re
 import sys
+import argparse
 
 try:
     from tqdm.auto import tqdm
@@ -17,6 +18,16 @@ except ImportError:
     HAS_TQDM = False
     print("\n[INFO] 'tqdm' Library is Not Installed on your system. Hence, the Progress Bar while Downloading Files will appear a bit differently.\n")
 
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from pipeline_metrics import StageMetrics
+from metrics_server import start_metrics_server, add_metrics_argument
+from rate_limiter import QuotaLimiter, DEFAULT_RESET_UTC
+from download_plan import DownloadPlan, DONE, FAILED
+from shard_coordinator import make_shards, open_store, worker_id, LeaseHeartbeat
+
+metrics = StageMetrics("mosdac_download")
+
 token_url = "https://mosdac.gov.in/download_api/gettoken"
 search_url = "https://mosdac.gov.in/apios/datasets.json"
 check_internet_url = "https://mosdac.gov.in/download_api/check-internet"
@@ -87,11 +98,16 @@ download_path = download_settings.get("download_path").replace("\\", "/") or os.
 use_date_structure = download_settings.get("organize_by_date", False)
 skip_user_input = download_settings.get("skip_user_input", False)
 generate_logs = download_settings.get("generate_error_logs", False)
+reuse_download_plan = download_settings.get("reuse_download_plan", True)
+
+# Cached Search Results and Per-File Download Status
+plan_dir = download_settings.get("plan_dir") or os.path.join(os.getcwd(), "download_plans")
 
 bool_fields = {
     "organize_by_date": use_date_structure,
     "skip_user_input": skip_user_input,
-    "generate_error_logs": generate_logs
+    "generate_error_logs": generate_logs,
+    "reuse_download_plan": reuse_download_plan
 }
 
 invalid_fields = []
@@ -117,6 +133,28 @@ count = search_params.get("count", "")
 boundingBox = search_params.get("boundingBox", "")
 gId = search_params.get("gId", "")
 
+# Optional 'rate_limit' section: known quotas (learned automatically if not set)
+rate_limit_settings = config_file.get("rate_limit", {})
+rate_limiter = QuotaLimiter(
+    state_path=rate_limit_settings.get("state_file") or os.path.join(os.getcwd(), "quota_state.json"),
+    per_minute=rate_limit_settings.get("per_minute"),
+    per_day=rate_limit_settings.get("per_day"),
+    reset_utc=rate_limit_settings.get("daily_reset_utc") or DEFAULT_RESET_UTC
+)
+
+# Optional 'daemon' section: settings for the Long-Running '--daemon' Mode
+daemon_settings = config_file.get("daemon", {})
+poll_interval_minutes = float(daemon_settings.get("poll_interval_minutes") or 5)
+lookback_hours = float(daemon_settings.get("lookback_hours") or 6)
+token_refresh_minutes = float(daemon_settings.get("token_refresh_minutes") or 30)
+daemon_state_file = daemon_settings.get("state_file") or os.path.join(os.getcwd(), "daemon_state.json")
+
+# Optional 'sharding' section: settings for '--shard-worker' (Several Hosts/Accounts sharing One Backfill)
+shard_settings = config_file.get("sharding", {})
+shard_coordinator = shard_settings.get("coordinator") or os.path.join(os.getcwd(), "shard_leases")
+shard_days = int(shard_settings.get("shard_days") or 1)
+lease_minutes = float(shard_settings.get("lease_minutes") or 30)
+shard_end_inclusive = shard_settings.get("end_inclusive", True)
 
 
 logger = logging.getLogger("client_error_logger")
@@ -249,11 +287,8 @@ def format_size(size_mb):
         size_tb = size_mb / (1024 ** 2)
         return f"{size_tb:,.2f} TB"
 
-# Fetches Total Results found for User's Search
-def search_results():
-    """Fetches all data from the search endpoint using pagination.""" 
-    print()
-    print("Searching Data for Provided Parameters...")
+def build_search_query():
+    """Search Parameters from 'config.json' (Empty Values Filtered Out)."""
     data = {"datasetId": datasetId}
 
     optional_parameters = {
@@ -266,29 +301,50 @@ def search_results():
 
     # Filters out Empty Values
     data.update({k: v for k, v in optional_parameters.items() if v})
+    return data
+
+def print_search_summary(total_results, total_size, items_per_page):
+    formatted_size = format_size(total_size)
+
+    if count != "":
+        if skip_user_input:
+            print(f"\n{UNDERLINE}{items_per_page}{RESET} Files Found for {datasetId}{RESET}")
+        else:
+            print(f"\n{UNDERLINE}{items_per_page}{RESET} Files Found for {datasetId}{RESET}.\nDo you want to Download them? [Y/N]: ")
+        return items_per_page
+
+    if skip_user_input:
+        print(f"\n{UNDERLINE}{total_results:,}{RESET} Files Found with Total Size of {UNDERLINE}{formatted_size}{RESET}")
+    else:
+        print(f"\n{UNDERLINE}{total_results:,}{RESET} Files Found with Total Size of {UNDERLINE}{formatted_size}{RESET}.\nDo you want to Download them? [Y/N]: ")
+    return total_results
+
+# Fetches Total Results found for User's Search
+def search_results(plan):
+    """Fetches the Total Results for the Search (from the Cached Download Plan if Available).""" 
+    print()
+
+    # A Completed Plan already holds the Full Result Set - No Search Request Needed
+    if plan.complete and plan.meta:
+        print(f"[INFO] Using Cached Search Results from '{plan.path}' ({plan.done_count():,} of {len(plan.entries):,} Files Already Downloaded)")
+        return print_search_summary(plan.meta["totalResults"], plan.meta["totalSizeMB"], plan.meta["itemsPerPage"])
 
+    print("Searching Data for Provided Parameters...")
+    return print_search_summary(*fetch_search_totals(plan))
+
+def fetch_search_totals(plan):
+    """Requests the First Search Page for the Plan's Query and Stores its Totals in the Plan."""
     try:
-        res = requests.get(search_url, params=data)
+        res = requests.get(search_url, params=plan.query)
+        metrics.add("search_requests")
         if res.status_code == 200:
             list = res.json()
             totalResults = list["totalResults"]
             totalSize = list["totalSizeMB"]
             itemsPerPage = list["itemsPerPage"]
 
-            formatted_size = format_size(totalSize)
-
-            if count != "":
-                if skip_user_input:
-                    print(f"\n{UNDERLINE}{itemsPerPage}{RESET} Files Found for {datasetId}{RESET}")
-                else:
-                    print(f"\n{UNDERLINE}{itemsPerPage}{RESET} Files Found for {datasetId}{RESET}.\nDo you want to Download them? [Y/N]: ")
-                return list['itemsPerPage']
-
-            if skip_user_input:
-                print(f"\n{UNDERLINE}{totalResults:,}{RESET} Files Found with Total Size of {UNDERLINE}{formatted_size}{RESET}")
-            else:
-                print(f"\n{UNDERLINE}{totalResults:,}{RESET} Files Found with Total Size of {UNDERLINE}{formatted_size}{RESET}.\nDo you want to Download them? [Y/N]: ")
-            return list["totalResults"]
+            plan.set_totals(totalResults, totalSize, itemsPerPage)
+            return totalResults, totalSize, itemsPerPage
         
         elif res.status_code // 100 in [4, 5]: 
             list = res.json()
@@ -310,13 +366,56 @@ def search_results():
                 logger.error(f"\nUnexpected Status Code encountered in Search API's Response:\nError Details: ", exc_info=True)
             sys.exit(1)
 
-def fetch_and_download_data(total_files, access_token, refresh_token):
-    """Fetches all data from the search endpoint using pagination.""" 
+def build_download_plan(plan, total_files):
+    """Fetches the Search Pages Not Yet in the Plan (all of them on the First Run)."""
+    if plan.complete:
+        return True
+
+    data = dict(plan.query)
+    start_Index = plan.next_start_index
+
+    if start_Index > 1:
+        print(f"\n[INFO] Continuing Search from Result {start_Index} (Earlier Pages are Cached)..")
+
+    while len(plan.entries) < total_files:
+        data["startIndex"] = start_Index # Sets 'startIndex' for Pagination 
+        try:
+            res = requests.get(search_url, params=data)
+            metrics.add("search_requests")
+
+            if res.status_code == 200:
+                list = res.json()
+
+                if not list or not list.get('entries'): # Stops if No More Results
+                    break
+
+                plan.add_page(list['entries'])
+
+                # Increments startIndex for Next Batch
+                start_Index += len(list['entries'])
+            else:
+                print(f"\nUnexpected Status Code: {res.status_code}")
+                res.raise_for_status()
+
+        except requests.exceptions.RequestException as e:
+            try:
+                error_message = res.json()['message'][0]
+            except (NameError, ValueError, KeyError, IndexError, TypeError):
+                error_message = str(e)
+            print(f"\n\n[ERROR] Error Fetching Data from 'build_download_plan()' method.\n\nError Message: {error_message}\nError Details: {e}")
+            if generate_logs:
+                logger.error(f"\n\nError Fetching Data from 'build_download_plan()' method.\n\nError Message: {error_message}\nError Details: ", exc_info=True)
+            return False # Pages Fetched so far stay Cached for the Next Run
+
+    plan.mark_complete()
+    return True
+
+def fetch_and_download_data(total_files, access_token, refresh_token, plan, heartbeat=None):
+    """
+    Downloads every Pending Entry of the Download Plan, Fetching Missing Search Pages First.
+    With a Shard's Lease 'heartbeat', Stops before the Next File once the Lease is Lost.
+    """
 
-    batch_size = 100
-    start_Index = 1
-    
-    counter = 1
     download_count = 0
     skip_count = 0
 
@@ -338,83 +437,45 @@ def fetch_and_download_data(total_files, access_token, refresh_token):
         print("Exception occured while retrieving Internet Check: ", e)
         logger.error("Exception occured while retrieving Internet Check: ", exc_info=True)
 
-    optional_parameters = {
-    "startTime": startTime,
-    "endTime": endTime,
-    "count": count,
-    "boundingBox": boundingBox,
-    "gId": gId
-    }
-    # Filters out Empty Values
-    data.update({k: v for k, v in optional_parameters.items() if v})
-
     try:
-        while counter <= total_files: 
-            
-            data["startIndex"] = start_Index # Sets 'startIndex' for Pagination 
-            try:
-                res = requests.get(search_url, params=data)
-                
-                if res.status_code == 200:
-                    list=res.json()
-                    
-                    if not list: # Stops if No More Results
-                        break
-
-                    for item in list['entries']:
-                        identifier = item['identifier']
-                        record_id = item['id']
-                        prod_date = item['updated']
-                        file_path = download_data(access_token, record_id, identifier, prod_date, counter, total_files)
-                        
-                        if file_path == 'NOT_RELEASED':
-                            print("This Product is not yet Released on MOSDAC. Please try searching for a different 'datasetId'.\nExiting...")
-                            logout()
-                            sys.exit(1)
-
-                        if file_path == "Invalid/Expired Token":
-                            new_access_token = refresh_access_token(refresh_token)
-                            if (new_access_token):
-                                access_token = new_access_token['access_token'] # Updates New Access Token Globally
-                                refresh_token = new_access_token['refresh_token'] # Updates New Refresh Token Globally
-                                file_path = download_data(access_token, record_id, identifier, prod_date, counter, total_files)
-                                counter += 1
-                            else:
-                                print("\n[ERROR] Token could not be Refreshed due to Invalid Refresh Token. Stopping Download...") 
-                                if generate_logs:
-                                    logger.error("\nThere was an Error encountered to Refresh Access Token due to Invalid Refresh Token provided, and hence, Download cannot proceed.")
-                                logout()
-                                sys.exit(1) # Exit if Token Refresh Fails
-
-                        counter += 1
-
-                        # Calculating Total Download Statistics
-                        if file_path and os.path.exists(file_path):
-                            download_count += 1
-                        elif not file_path:
-                            skip_count += 1
-
-                    # Increments startIndex for Next Batch
-                    start_Index += batch_size
-                
-                else:
-                    print(f"\nUnexpected Status Code: {res.status_code}")
-                    res.raise_for_status()
-
-            except requests.exceptions.RequestException as e:
-                res_json = res.json()
-                error_message = res_json['message'][0] 
-                print(f"\n\n[ERROR] Error Fetching Data from 'fetch_and_download_data()' method.\n\nError Message: {error_message}\nError Details: {e}")
-                if generate_logs:
-                    logger.error("\n\nError Fetching Data from 'fetch_and_download_data()' method.\n\nError Message: {error_message}\nError Details: ", exc_info=True)
-                break # Exits loop on Error
-
-        if counter == (total_files + 1):
-            return True, download_count, skip_count
-        else:
+        if not build_download_plan(plan, total_files):
             return False, 0, 0
+
+        pending = plan.pending()
+        total_files = len(plan.entries)
+        if not pending:
+            print(f"\n[INFO] All {total_files:,} Files were Downloaded in Previous Runs.")
+            return True, 0, 0
+        if len(pending) < total_files:
+            print(f"\n[INFO] {total_files - len(pending):,} of {total_files:,} Files Already Downloaded. Starting from File {pending[0][0] + 1}..")
+
+        tokens = {"access_token": access_token, "refresh_token": refresh_token}
+
+        for remaining, (position, item) in enumerate(pending):
+            if heartbeat is not None and heartbeat.lost:
+                print(f"\n[INFO] Lease Lost. Stopping with {len(pending) - remaining:,} File(s) Left to the Worker that Took it Over.")
+                break
+            metrics.gauge("queue_depth", len(pending) - remaining)
+            counter = position + 1
+            identifier = item['identifier']
+            record_id = item['id']
+            prod_date = item['updated']
+            file_path = download_with_refresh(tokens, record_id, identifier, prod_date, counter, total_files)
+
+            # Calculating Total Download Statistics
+            if file_path and os.path.exists(file_path):
+                download_count += 1
+            elif not file_path:
+                skip_count += 1
+
+            # Already Existing Files count as Done, Failed ones are Retried on the Next Run
+            final_path = os.path.join(get_folder_structure(prod_date), identifier)
+            plan.mark(record_id, DONE if os.path.exists(final_path) else FAILED)
+
+        metrics.gauge("queue_depth", 0)
+        return True, download_count, skip_count
     except KeyboardInterrupt:
-        print("\nDownload Interrupted By User. Exiting..")
+        print("\nDownload Interrupted By User. Progress is Saved, Run Again to Resume. Exiting..")
         return False, 0, 0
     except PermissionError:
         print(f"\n[ERROR]: No Permission to Write on '{download_path}'. Please Check and Update Directory Permissions or use Another Directory.")
@@ -425,6 +486,36 @@ def fetch_and_download_data(total_files, access_token, refresh_token):
         sys.exit(1)
     except Exception as e:
         print(f"\nException encountered in 'fetch_and_download_data()': {e}\n")
+        return False, 0, 0
+
+def download_with_refresh(tokens, record_id, identifier, prod_date, counter, total_files):
+    """download_data() that Refreshes the Access Token once if it has Expired. Updates 'tokens' in place."""
+    file_path = download_data(tokens["access_token"], record_id, identifier, prod_date, counter, total_files)
+    
+    if file_path == 'NOT_RELEASED':
+        print("This Product is not yet Released on MOSDAC. Please try searching for a different 'datasetId'.\nExiting...")
+        logout()
+        sys.exit(1)
+
+    if file_path == "Invalid/Expired Token":
+        new_access_token = refresh_access_token(tokens["refresh_token"])
+        if not new_access_token and rate_limiter.limit_hits:
+            # Refresh Token may have Expired while Waiting for the Quota to Reset
+            print("\n[INFO] Logging In Again..")
+            new_access_token, _ = get_token()
+        if (new_access_token):
+            tokens["access_token"] = new_access_token['access_token'] # Updates New Access Token Globally
+            tokens["refresh_token"] = new_access_token['refresh_token'] # Updates New Refresh Token Globally
+            metrics.add("token_refreshes")
+            file_path = download_data(tokens["access_token"], record_id, identifier, prod_date, counter, total_files)
+        else:
+            print("\n[ERROR] Token could not be Refreshed due to Invalid Refresh Token. Stopping Download...") 
+            if generate_logs:
+                logger.error("\nThere was an Error encountered to Refresh Access Token due to Invalid Refresh Token provided, and hence, Download cannot proceed.")
+            logout()
+            sys.exit(1) # Exit if Token Refresh Fails
+
+    return file_path
 
 def get_user_input():
     try:
@@ -446,6 +537,28 @@ def get_user_input():
             logger.error("There was an Exception encounterd in the 'get_user_input()' method.\nError Details: ", exc_info=True)
         sys.exit(1)
 
+def get_folder_structure(prod_date):
+    """Folder a File is Downloaded into (Dataset/Year/DDMON if 'organize_by_date' is Enabled)."""
+    if not use_date_structure:
+        return download_path
+
+    # Creates Dataset Specific Path in Download Directory
+    dataset_download_path = os.path.join(download_path, datasetId)
+    if prod_date == None:
+        return dataset_download_path
+
+    date_obj = datetime.strptime(prod_date, "%Y-%m-%dT%H:%M:%SZ")
+
+    year = date_obj.strftime("%Y")
+    day = date_obj.strftime("%d")
+    month_abbr = date_obj.strftime("%b").upper()
+
+    # Creates 'Archival' Date-Month Strcuture (eg: "09AUG")
+    day_month = f"{day}{month_abbr}"
+
+    # Creates Folder Strucutre (eg: 2025/09AUG)
+    return os.path.join(dataset_download_path, year, day_month)
+
 def download_data(bearer_token, record_id, identifier, prod_date, counter, total_files): 
     """Download data using the record ID and collection."""
     # Creates Download Path if Not Already Exist
@@ -462,27 +575,9 @@ def download_data(bearer_token, record_id, identifier, prod_date, counter, total
 
         for attempt, delay in enumerate(RETRY_DELAYS + [None]):
             try:
-                if use_date_structure: # Can be Put under fetch_and_download_data() for Single Time Use..
-                    # Creates Dataset Specific Path in Download Directory
-                    dataset_download_path = os.path.join(download_path, datasetId)
-                    if prod_date == None:
-                        print(f"\n[WARNING] File: '{identifier}' does not support 'organize_by_date' and hence, will be Downloaded inside the DatasetID directory instead..")
-                        folder_structure = dataset_download_path
-                    
-                    else:
-                        date_obj = datetime.strptime(prod_date, "%Y-%m-%dT%H:%M:%SZ")
-
-                        year = date_obj.strftime("%Y")
-                        day = date_obj.strftime("%d")
-                        month_abbr = date_obj.strftime("%b").upper()
-
-                        # Creates 'Archival' Date-Month Strcuture (eg: "09AUG")
-                        day_month = f"{day}{month_abbr}"
-
-                        # Creates Folder Strucutre (eg: 2025/09AUG)
-                        folder_structure = os.path.join(dataset_download_path, year, day_month)
-                else:
-                    folder_structure = download_path
+                if use_date_structure and prod_date == None:
+                    print(f"\n[WARNING] File: '{identifier}' does not support 'organize_by_date' and hence, will be Downloaded inside the DatasetID directory instead..")
+                folder_structure = get_folder_structure(prod_date)
 
                 os.makedirs(folder_structure, exist_ok=True) 
 
@@ -493,7 +588,11 @@ def download_data(bearer_token, record_id, identifier, prod_date, counter, total
                     print(f"\n[INFO] {identifier} Already Exists in {folder_structure}. Skipping Download..")
                     return None
 
+                # Waits as needed to stay inside the Per-Minute and Daily Quotas
+                rate_limiter.acquire()
+                request_start = time.time()
                 response = requests.get(download_url, headers=headers, params=params, stream=True, timeout=5)
+                rate_limiter.record(response)
 
                 if response.status_code == 400:
                     resp = response.json()
@@ -517,18 +616,21 @@ def download_data(bearer_token, record_id, identifier, prod_date, counter, total
                 
                 # If Rate Limit Reached, Error Handling According to the Err. Type
                 if response.status_code == 429:
+                    metrics.add("http_429")
                     resp = response.json()
                     err_msg = resp['message']
                     err_type = resp['type']
 
+                    # The Limiter has Learned the Quota and Waits in acquire() before the Retry
                     if err_type == 'minute_limit':
                         print(f"\n{err_msg}")
-                        time.sleep(20)
+                        metrics.add("minute_limit_hits")
                         continue
                     elif err_type == 'daily_limit':
                         print(f"\n{err_msg}")
-                        logout()
-                        sys.exit(1) 
+                        print(f"[INFO] Daily Quota of {rate_limiter.per_day} Downloads Reached. Progress Saved in '{rate_limiter.state_path}'.")
+                        metrics.add("daily_limit_hits")
+                        continue
                             
                 response.raise_for_status()
                 
@@ -627,6 +729,9 @@ def download_data(bearer_token, record_id, identifier, prod_date, counter, total
 
                 # Renames Temp File to Final File after Successful Download
                 os.rename(tmp_file_path, file_path)
+                metrics.add("granules")
+                metrics.add("bytes_downloaded", os.path.getsize(file_path))
+                metrics.observe("file_download", time.time() - request_start)
                 
                 return file_path
 
@@ -638,6 +743,7 @@ def download_data(bearer_token, record_id, identifier, prod_date, counter, total
                         logger.error(f"\nDownload was Stopped after Multiple Attempts due to the encountered Network Error. Please check your Internet connection and Try Again.\n")
                     return None
                 print(f"\n[INFO] Retrying in {delay} seconds...")
+                metrics.add("retries")
                 if tmp_file_path and os.path.exists(tmp_file_path):
                     os.remove(tmp_file_path)
                 time.sleep(delay)
@@ -718,9 +824,258 @@ def logout():
                 logger.error(f"Error Encountered during Logout | Error Details: ", exc_info=True)
         
 
+def load_daemon_state():
+    """Last Seen 'updated' Timestamp and the IDs Already Handled around it."""
+    if os.path.exists(daemon_state_file):
+        try:
+            with open(daemon_state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"[WARNING] Could not read '{daemon_state_file}'. Starting from the Configured 'startTime'..")
+    return {"last_updated": "", "seen": {}}
+
+def save_daemon_state(state):
+    tmp_path = daemon_state_file + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, daemon_state_file)
+
+def parse_updated(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+def window_start(state, now):
+    """Start of the Poll Window: Last Seen 'updated' minus the Lookback (the Configured 'startTime' on the First Poll)."""
+    if state["last_updated"]:
+        return parse_updated(state["last_updated"]) - timedelta(hours=lookback_hours)
+    if startTime:
+        return datetime.strptime(startTime[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return now - timedelta(hours=lookback_hours)
+
+def poll_new_entries(state):
+    """Searches only the Recent Window (Last Seen 'updated' minus the Lookback) and Returns Unseen Entries."""
+    now = datetime.now(timezone.utc)
+    since = window_start(state, now)
+    since_str = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # The Search only takes Dates, so it Returns Everything since Midnight; Older Entries were Handled by Earlier Polls
+    data = build_search_query()
+    data.pop("count", None)
+    data["startTime"] = since.strftime("%Y-%m-%d")
+    data["endTime"] = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    new_entries = []
+    start_Index = 1
+    while True:
+        data["startIndex"] = start_Index
+        res = requests.get(search_url, params=data, timeout=30)
+        metrics.add("search_requests")
+        res.raise_for_status()
+        page = res.json()
+        entries = (page.get("entries") or []) if page else []
+        if not entries:
+            break
+
+        new_entries.extend(item for item in entries
+                           if item["id"] not in state["seen"] and (item.get("updated") or since_str) >= since_str)
+
+        start_Index += len(entries)
+        if start_Index > page.get("totalResults", 0):
+            break
+
+    return sorted(new_entries, key=lambda item: item.get("updated") or "")
+
+def remember_entry(state, item):
+    updated = item.get("updated") or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    state["seen"][item["id"]] = updated
+    if updated > state["last_updated"]:
+        state["last_updated"] = updated
+
+    # Polls Skip Entries Updated before the Window Start, so Only IDs inside the Window need Remembering
+    cutoff = window_start(state, datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    state["seen"] = {k: v for k, v in state["seen"].items() if v >= cutoff}
+    save_daemon_state(state)
+
+def renew_session(tokens):
+    """Refreshes the Tokens (Logging In Again if the Refresh Token has Expired). Updates 'tokens' in place."""
+    new_tokens = refresh_access_token(tokens["refresh_token"])
+    if not new_tokens:
+        print("\n[INFO] Logging In Again..")
+        new_tokens, _ = get_token()
+    tokens["access_token"] = new_tokens["access_token"]
+    tokens["refresh_token"] = new_tokens["refresh_token"]
+    metrics.add("token_refreshes")
+
+def run_daemon(tokens):
+    """Polls the Search Endpoint every 'poll_interval_minutes' and Downloads only the New Granules."""
+    state = load_daemon_state()
+    last_refresh = time.time()
+
+    print(f"\n{GREEN}Daemon Mode Started.{RESET} Polling for New '{datasetId}' Files every {poll_interval_minutes:g} min. Press Ctrl+C to Stop.")
+    if state["last_updated"]:
+        print(f"[INFO] Last Seen File was Updated at {state['last_updated']}")
+
+    try:
+        while True:
+            cycle_start = time.time()
+
+            # Keeps the Session Alive between Polls
+            if time.time() - last_refresh >= token_refresh_minutes * 60:
+                renew_session(tokens)
+                last_refresh = time.time()
+
+            try:
+                with metrics.stage("poll"):
+                    new_entries = poll_new_entries(state)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"\n[WARNING] Polling Failed, Retrying at the Next Poll.\nError Details: {e}")
+                if generate_logs:
+                    logger.error("Polling the Search Endpoint Failed in Daemon Mode.\nError Details: ", exc_info=True)
+                new_entries = []
+
+            if new_entries:
+                print(f"\n[{datetime.now():%d-%m-%Y %H:%M:%S}] {len(new_entries)} New File(s) Found")
+            with metrics.stage("download"):
+                for counter, item in enumerate(new_entries, start=1):
+                    metrics.gauge("queue_depth", len(new_entries) - counter + 1)
+                    prod_date = item.get("updated")
+                    download_with_refresh(tokens, item["id"], item["identifier"], prod_date, counter, len(new_entries))
+                    if os.path.exists(os.path.join(get_folder_structure(prod_date), item["identifier"])):
+                        remember_entry(state, item)
+                metrics.gauge("queue_depth", 0)
+
+            if metrics.enabled:
+                metrics.write()
+
+            time.sleep(max(poll_interval_minutes * 60 - (time.time() - cycle_start), 1))
+    except KeyboardInterrupt:
+        print("\nDaemon Stopped By User. Exiting..")
+
+def shard_query(shard):
+    """Search Query of the Configured Parameters Restricted to One Shard's Time Range."""
+    data = build_search_query()
+    data.pop("count", None)
+    data["startTime"] = shard["startTime"]
+    data["endTime"] = shard["endTime"]
+    return data
+
+def run_shard_worker(tokens):
+    """
+    Splits 'startTime'-'endTime' into Shards of 'shard_days' and Downloads the Shards this Worker Claims
+    from the Shared 'coordinator' (Lease Directory or SQLite File), until Every Shard is Done.
+    Leases are Renewed while a Shard Downloads; a Crashed Worker's Lease Expires and is Taken Over.
+    """
+    if not startTime or not endTime:
+        print("\n[ERROR] Shard Mode needs both 'startTime' and 'endTime' in 'search_parameters' of your 'config.json'.")
+        return
+
+    shards = make_shards(datasetId, startTime, endTime, shard_days, shard_end_inclusive)
+    store = open_store(shard_coordinator, lease_minutes * 60)
+    store.ensure_shards(shards)
+    owner = worker_id()
+    last_refresh = time.time()
+    failed_shards = set() # Released with Failed Files, Left for Another Worker or the Next Run
+
+    print(f"\n{GREEN}Shard Worker '{owner}' Started.{RESET} {len(shards)} Shard(s) of {shard_days} Day(s) Coordinated through '{shard_coordinator}'")
+
+    try:
+        while True:
+            remaining = [s for s in shards if s["id"] not in failed_shards]
+            if not remaining or (failed_shards and store.all_done(remaining)):
+                print(f"\n[WARNING] {len(failed_shards)} Shard(s) still have Failed Files and were Left Pending for Another Worker or the Next Run.")
+                return
+
+            shard = store.claim(remaining, owner)
+            if shard is None:
+                if store.all_done(shards):
+                    print(f"\n{GREEN}All {len(shards)} Shards are Done.{RESET}")
+                    return
+                # Remaining Shards are Leased by other Workers; Waits in case one of them Crashes
+                print(f"\n[INFO] No Free Shard Left. Checking Again in {lease_minutes / 3:g} min..")
+                time.sleep(lease_minutes * 20)
+                continue
+
+            # Keeps the Session Alive between Shards
+            if time.time() - last_refresh >= token_refresh_minutes * 60:
+                renew_session(tokens)
+                last_refresh = time.time()
+
+            if not download_shard(store, shard, owner, tokens, failed_shards):
+                return
+    except KeyboardInterrupt:
+        print("\nShard Worker Stopped By User. Its Lease Expires and the Shard is Taken Over by Another Worker. Exiting..")
+
+def download_shard(store, shard, owner, tokens, failed_shards):
+    """
+    Downloads One Claimed Shard and Marks it Done. Returns False if the Worker should Stop.
+    A Shard with Failed Files is Released instead (and added to 'failed_shards'), so they are Retried.
+    """
+    metrics.add("shards_claimed")
+    print(f"\n[INFO] Claimed Shard '{shard['id']}' ({shard['startTime']} to {shard['endTime']})")
+
+    plan = DownloadPlan(plan_dir, shard_query(shard))
+    if not reuse_download_plan:
+        plan.reset()
+
+    with LeaseHeartbeat(store, shard["id"], owner, lease_minutes * 20) as heartbeat:
+        with metrics.stage("search"):
+            total_files = plan.meta["totalResults"] if plan.complete and plan.meta else fetch_search_totals(plan)[0]
+        download_complete, download_count = True, 0
+        if total_files:
+            with metrics.stage("download"):
+                download_complete, download_count, _ = fetch_and_download_data(total_files, tokens["access_token"], tokens["refresh_token"], plan, heartbeat)
+
+    if metrics.enabled:
+        metrics.write()
+
+    if heartbeat.lost:
+        return True # Another Worker has Taken the Shard Over
+    if not download_complete:
+        store.release(shard["id"], owner)
+        print(f"\n[INFO] Shard '{shard['id']}' Released for Another Worker. Run Again to Resume.")
+        return False
+
+    failed = len(plan.pending())
+    if failed:
+        store.release(shard["id"], owner)
+        failed_shards.add(shard["id"])
+        metrics.add("shards_released")
+        print(f"\n[WARNING] {failed} File(s) of Shard '{shard['id']}' could not be Downloaded. Shard Left Pending for Another Worker (or the Next Run) to Retry.")
+        return True
+
+    store.complete(shard["id"], owner)
+    metrics.add("shards_done")
+    print(f"\n{GREEN}Shard '{shard['id']}' Done.{RESET} {download_count} File(s) Downloaded.")
+    return True
+
 def main():
+    parser = argparse.ArgumentParser(description="Downloads MOSDAC data for the 'search_parameters' in 'config.json'")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and download newly published files as they appear")
+    parser.add_argument("--shard-worker", action="store_true",
+                        help="Download the date range in shards claimed from the 'sharding' coordinator, together with other hosts")
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+
+    start_metrics_server(metrics, args.metrics_port)
+
+    if args.daemon or args.shard_worker:
+        result = get_token()
+        if result is None:
+            exit()
+        tokens, user = result
+        print(f"\n{GREEN}Login Successful.{RESET} {BOLD}Hello {user}!{RESET}")
+        if args.daemon:
+            run_daemon(tokens)
+        else:
+            run_shard_worker(tokens)
+        logout()
+        return
+
+    plan = DownloadPlan(plan_dir, build_search_query())
+    if not reuse_download_plan:
+        plan.reset()
 
-    total_files = search_results()  
+    with metrics.stage("search"):
+        total_files = search_results(plan)  
     user_response = get_user_input()
 
     # Ending Script if User Response = No
@@ -750,7 +1105,8 @@ def main():
 
     start_time = time.time()
 
-    download_complete, download_count, skip_count = fetch_and_download_data(total_files, access_token, refresh_token)
+    with metrics.stage("download"):
+        download_complete, download_count, skip_count = fetch_and_download_data(total_files, access_token, refresh_token, plan)
     
     end_time = time.time()
 
@@ -771,6 +1127,10 @@ def main():
             print(f"Total Time Taken: {total_minutes:.2f} min")
         else:
             print(f"Total Time Taken: {total_time:.2f} sec")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
     
     logout()
 
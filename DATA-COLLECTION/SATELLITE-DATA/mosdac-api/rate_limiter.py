@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+# MOSDAC quotas reset at midnight IST (18:30 UTC)
+DEFAULT_RESET_UTC = "18:30"
+
+
+class QuotaLimiter:
+    """
+    Token bucket limiter for the MOSDAC download API.
+
+    The per-minute and daily quotas are learned from the server: from rate limit
+    headers when present, from the numbers in 429 messages, and otherwise from how
+    many requests had been made when a 429 'minute_limit' / 'daily_limit' arrived.
+    Requests are then spaced (with a safety margin) so the limits are not hit again.
+    Usage and learned limits are saved to 'state_path' so they survive restarts.
+    """
+
+    def __init__(self, state_path="quota_state.json", per_minute=None, per_day=None,
+                 safety=0.9, burst=1, reset_utc=DEFAULT_RESET_UTC):
+        self.state_path = state_path
+        self.safety = safety
+        self.burst = max(1, burst)
+        self.reset_hour, self.reset_minute = (int(v) for v in reset_utc.split(":"))
+        self.lock = threading.Lock()
+
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.used_today = 0
+        self.period = self._period_key(datetime.now(timezone.utc))
+        self.blocked_until = None
+        self.recent = deque()  # timestamps of requests in the last minute
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.limit_hits = 0
+
+        self._load()
+        # Limits from 'config.json' take priority over learned ones
+        if per_minute:
+            self.per_minute = per_minute
+        if per_day:
+            self.per_day = per_day
+
+    # ----------------------------------------------------------- state ----
+
+    def _period_key(self, now):
+        """Quota day this moment belongs to (the date of the last reset)."""
+        reset_today = now.replace(hour=self.reset_hour, minute=self.reset_minute, second=0, microsecond=0)
+        last_reset = reset_today if now >= reset_today else reset_today - timedelta(days=1)
+        return last_reset.strftime("%Y-%m-%dT%H:%M")
+
+    def next_reset(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        reset = now.replace(hour=self.reset_hour, minute=self.reset_minute, second=0, microsecond=0)
+        return reset if reset > now else reset + timedelta(days=1)
+
+    def _load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            print(f"[WARNING] Could not read '{self.state_path}'. Starting with Fresh Quota State..")
+            return
+
+        self.per_minute = state.get("per_minute")
+        self.per_day = state.get("per_day")
+        if state.get("period") == self.period:
+            self.used_today = state.get("used_today", 0)
+        if state.get("blocked_until"):
+            blocked = datetime.fromisoformat(state["blocked_until"])
+            if blocked > datetime.now(timezone.utc):
+                self.blocked_until = blocked
+        now = time.time()
+        self.recent.extend(t for t in state.get("recent", []) if now - t < 60)
+
+    def save(self):
+        state = {
+            "per_minute": self.per_minute,
+            "per_day": self.per_day,
+            "period": self.period,
+            "used_today": self.used_today,
+            "blocked_until": self.blocked_until.isoformat() if self.blocked_until else None,
+            "recent": list(self.recent),
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------------------------------------------------------- waiting ----
+
+    def _new_period_check(self, now):
+        period = self._period_key(now)
+        if period != self.period:
+            self.period = period
+            self.used_today = 0
+
+    def _sleep_until(self, when, reason):
+        """Sleeps until 'when' (UTC), printing the resume time once."""
+        local = when.astimezone()
+        print(f"\n[INFO] {reason}. Resuming automatically at {local:%d-%m-%Y %H:%M:%S}..")
+        while True:
+            remaining = (when - datetime.now(timezone.utc)).total_seconds()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 60))
+
+    def interval(self):
+        """Seconds between requests at the learned per-minute rate (0 if unknown)."""
+        if not self.per_minute:
+            return 0.0
+        return 60.0 / max(self.per_minute * self.safety, 1e-6)
+
+    def acquire(self):
+        """Blocks until one more request fits inside both quotas, then counts it."""
+        while True:
+            # The wait is worked out under the lock but slept outside it, so other threads
+            # can still record responses (and learn a new block) in the meantime
+            with self.lock:
+                now = datetime.now(timezone.utc)
+                self._new_period_check(now)
+
+                if self.per_day and self.used_today >= self.per_day:
+                    self.blocked_until = max(self.blocked_until or now, self.next_reset(now))
+
+                blocked_until = self.blocked_until
+                if blocked_until and blocked_until > now:
+                    self.save()
+                    wait = None
+                else:
+                    self.blocked_until = None
+                    wait = self._bucket_wait()
+                    if wait <= 0:
+                        self.tokens -= 1
+                        self.recent.append(time.time())
+                        self.used_today += 1
+                        self.save()
+                        return
+
+            if wait is None:
+                self._sleep_until(blocked_until, "Rate Limit Reached")
+            else:
+                time.sleep(wait)
+
+    def _bucket_wait(self):
+        now_mono = time.monotonic()
+        now = time.time()
+        while self.recent and now - self.recent[0] >= 60:
+            self.recent.popleft()
+
+        if not self.per_minute:
+            return 0.0
+
+        # Hard cap: never more than the quota inside any 60 second window
+        if self.recent and len(self.recent) >= max(1, int(self.per_minute * self.safety)):
+            return 60 - (now - self.recent[0]) + 0.05
+
+        # Token bucket: refills at the per-minute rate, holds at most 'burst' tokens
+        rate = 1.0 / self.interval()
+        self.tokens = min(self.burst, self.tokens + (now_mono - self.last_refill) * rate)
+        self.last_refill = now_mono
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / rate
+
+    # --------------------------------------------------------- learning ----
+
+    def record(self, response):
+        """Learns from a response's status, headers and 429 body. Returns the 429 type or None."""
+        with self.lock:
+            self._learn_from_headers(response.headers)
+            if response.status_code != 429:
+                return None
+
+            self.limit_hits += 1
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            err_type = body.get("type", "minute_limit")
+            stated = self._limit_from_message(body.get("message", ""))
+            now = datetime.now(timezone.utc)
+
+            if err_type == "daily_limit":
+                self.per_day = stated or max(self.used_today - 1, 1)
+                self.blocked_until = self.next_reset(now)
+            else:
+                made = len(self.recent)
+                self.per_minute = stated or max(made - 1, 1)
+                retry_after = self._retry_after(response.headers)
+                self.blocked_until = now + timedelta(seconds=retry_after or 60)
+                # Requests made in the last minute count against the new window
+                self.tokens = 0.0
+            self.save()
+            return err_type
+
+    def _learn_from_headers(self, headers):
+        limit = headers.get("X-RateLimit-Limit")
+        if limit and limit.isdigit():
+            self.per_minute = int(limit)
+        daily = headers.get("X-RateLimit-Limit-Day")
+        if daily and daily.isdigit():
+            self.per_day = int(daily)
+        remaining = headers.get("X-RateLimit-Remaining-Day")
+        if remaining and remaining.isdigit() and self.per_day:
+            self.used_today = max(self.used_today, self.per_day - int(remaining))
+
+    @staticmethod
+    def _limit_from_message(message):
+        if isinstance(message, list):
+            message = " ".join(str(m) for m in message)
+        match = re.search(r"(\d+)\s*(?:requests?|downloads?|files?)?\s*(?:per|/|a|in a)\s*(?:minute|day)", str(message), re.I)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _retry_after(headers):
+        value = headers.get("Retry-After")
+        if value and value.isdigit():
+            return int(value)
+        return None
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+def make_shards(dataset_id, start_time, end_time, shard_days=1, end_inclusive=True):
+    """
+    Splits [start_time, end_time] ('YYYY-MM-DD') into consecutive shards of 'shard_days' days.
+    With end_inclusive the search API's endTime is treated as inclusive, so shards
+    do not share a day; otherwise each shard ends where the next one starts.
+    """
+    start = datetime.strptime(start_time[:10], "%Y-%m-%d")
+    end = datetime.strptime(end_time[:10], "%Y-%m-%d")
+    shards = []
+    while start <= end:
+        next_start = start + timedelta(days=shard_days)
+        if end_inclusive:
+            shard_end = min(next_start - timedelta(days=1), end)
+        else:
+            shard_end = min(next_start, end)
+        shards.append({
+            "id": f"{dataset_id}_{start:%Y%m%d}_{shard_end:%Y%m%d}",
+            "startTime": start.strftime("%Y-%m-%d"),
+            "endTime": shard_end.strftime("%Y-%m-%d"),
+        })
+        if not end_inclusive and shard_end >= end:
+            break
+        start = next_start
+    return shards
+
+
+def worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FileLeaseStore:
+    """
+    Leases as files in a directory on a shared filesystem (NFS/SMB):
+      <shard>.lease  -> {"owner", "expires"}, created atomically with O_EXCL
+      <shard>.done   -> written once the shard is finished
+    An expired lease is taken over under a short-lived <shard>.steal lock, so only
+    one worker can reclaim it. Renewing and releasing a lease take the same lock,
+    so a late renew or release never touches a lease another worker has just taken.
+    """
+
+    STALE_LOCK_SECONDS = 60
+
+    def __init__(self, directory, lease_seconds=1800):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, shard_id, suffix):
+        return os.path.join(self.directory, f"{shard_id}.{suffix}")
+
+    def _lease_record(self, owner):
+        return {"owner": owner, "expires": time.time() + self.lease_seconds, "host": socket.gethostname()}
+
+    def _read_lease(self, shard_id):
+        try:
+            with open(self._path(shard_id, "lease"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_lease(self, shard_id, owner):
+        tmp_path = self._path(shard_id, f"lease.{owner}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._lease_record(owner), f)
+        os.replace(tmp_path, self._path(shard_id, "lease"))
+
+    def ensure_shards(self, shards):
+        pass  # A shard without lease or done file is simply pending
+
+    def is_done(self, shard_id):
+        return os.path.exists(self._path(shard_id, "done"))
+
+    def _try_create(self, shard_id, owner):
+        try:
+            fd = os.open(self._path(shard_id, "lease"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._lease_record(owner), f)
+        return True
+
+    def _reclaim_stale_lock(self, lock_path):
+        """Removes a lock left by a worker that died while holding it."""
+        try:
+            if time.time() - os.path.getmtime(lock_path) <= self.STALE_LOCK_SECONDS:
+                return
+            # Renamed away atomically, so only one worker reclaims it
+            stale_path = f"{lock_path}.{worker_id()}-{threading.get_ident()}.stale"
+            os.rename(lock_path, stale_path)
+        except OSError:
+            return
+        try:
+            if time.time() - os.path.getmtime(stale_path) <= self.STALE_LOCK_SECONDS:
+                # Another worker reclaimed it first and this is its fresh lock: put it back
+                try:
+                    os.link(stale_path, lock_path)
+                except OSError:
+                    pass
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+    def _acquire_lock(self, shard_id, wait):
+        """Takes the <shard>.steal lock; waits for it if 'wait', otherwise gives up when it is held."""
+        lock_path = self._path(shard_id, "steal")
+        while True:
+            self._reclaim_stale_lock(lock_path)
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if not wait:
+                    return False
+            time.sleep(0.05)
+
+    def _release_lock(self, shard_id):
+        try:
+            os.remove(self._path(shard_id, "steal"))
+        except OSError:
+            pass
+
+    def _try_steal(self, shard_id, owner):
+        if not self._acquire_lock(shard_id, wait=False):
+            return False
+        try:
+            lease = self._read_lease(shard_id)
+            if lease and lease.get("expires", 0) > time.time():
+                return False  # Renewed in the meantime
+            self._write_lease(shard_id, owner)
+            return True
+        finally:
+            self._release_lock(shard_id)
+
+    def claim(self, shards, owner):
+        for shard in shards:
+            if self.is_done(shard["id"]):
+                continue
+            if self._try_create(shard["id"], owner):
+                return shard
+            lease = self._read_lease(shard["id"])
+            if lease is not None and lease.get("expires", 0) < time.time():
+                if self._try_steal(shard["id"], owner):
+                    print(f"[INFO] Reclaimed Expired Lease of '{shard['id']}' from {lease.get('owner')}")
+                    return shard
+        return None
+
+    def renew(self, shard_id, owner):
+        self._acquire_lock(shard_id, wait=True)
+        try:
+            lease = self._read_lease(shard_id)
+            if not lease or lease.get("owner") != owner:
+                return False  # Lost the lease (expired and reclaimed by another worker)
+            self._write_lease(shard_id, owner)
+            return True
+        finally:
+            self._release_lock(shard_id)
+
+    def complete(self, shard_id, owner):
+        with open(self._path(shard_id, "done"), "w") as f:
+            json.dump({"owner": owner, "finished": datetime.now().isoformat(timespec="seconds")}, f)
+        self.release(shard_id, owner)
+
+    def release(self, shard_id, owner):
+        self._acquire_lock(shard_id, wait=True)
+        try:
+            lease = self._read_lease(shard_id)
+            if lease and lease.get("owner") == owner:
+                try:
+                    os.remove(self._path(shard_id, "lease"))
+                except OSError:
+                    pass
+        finally:
+            self._release_lock(shard_id)
+
+    def all_done(self, shards):
+        return all(self.is_done(s["id"]) for s in shards)
+
+
+class SQLiteLeaseStore:
+    """Same leases in a SQLite database, for several workers on one host (or a stand-in for tests)."""
+
+    def __init__(self, db_path, lease_seconds=1800):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    id TEXT PRIMARY KEY,
+                    shard TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    owner TEXT,
+                    expires REAL
+                )""")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Autocommit; claims open their own BEGIN IMMEDIATE transaction
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def ensure_shards(self, shards):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO shards (id, shard) VALUES (?, ?)",
+                             [(s["id"], json.dumps(s)) for s in shards])
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def claim(self, shards, owner):
+        ids = [s["id"] for s in shards]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Serialises claims between workers
+            placeholders = ",".join("?" * len(ids))
+            row = conn.execute(
+                f"SELECT id, shard, owner FROM shards WHERE id IN ({placeholders}) AND "
+                f"(status = 'pending' OR (status = 'leased' AND expires < ?)) ORDER BY id LIMIT 1",
+                ids + [time.time()]).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute("UPDATE shards SET status = 'leased', owner = ?, expires = ? WHERE id = ?",
+                         (owner, time.time() + self.lease_seconds, row[0]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if row[2] and row[2] != owner:
+            print(f"[INFO] Reclaimed Expired Lease of '{row[0]}' from {row[2]}")
+        return json.loads(row[1])
+
+    def _update_owned(self, sql, params, shard_id, owner):
+        conn = self._connect()
+        try:
+            cur = conn.execute(sql + " WHERE id = ? AND owner = ? AND status = 'leased'", params + (shard_id, owner))
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def renew(self, shard_id, owner):
+        return self._update_owned("UPDATE shards SET expires = ?", (time.time() + self.lease_seconds,), shard_id, owner)
+
+    def complete(self, shard_id, owner):
+        self._update_owned("UPDATE shards SET status = 'done', expires = NULL", (), shard_id, owner)
+
+    def release(self, shard_id, owner):
+        self._update_owned("UPDATE shards SET status = 'pending', owner = NULL, expires = NULL", (), shard_id, owner)
+
+    def all_done(self, shards):
+        ids = [s["id"] for s in shards]
+        conn = self._connect()
+        try:
+            placeholders = ",".join("?" * len(ids))
+            done = conn.execute(f"SELECT COUNT(*) FROM shards WHERE id IN ({placeholders}) AND status = 'done'",
+                                ids).fetchone()[0]
+        finally:
+            conn.close()
+        return done == len(ids)
+
+
+def open_store(location, lease_seconds=1800):
+    """A '.db'/'.sqlite' path gives the SQLite store, anything else a lease directory."""
+    if location.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteLeaseStore(location, lease_seconds)
+    return FileLeaseStore(location, lease_seconds)
+
+
+class LeaseHeartbeat:
+    """Renews a lease in the background while a shard is being downloaded."""
+
+    def __init__(self, store, shard_id, owner, interval):
+        self.store = store
+        self.shard_id = shard_id
+        self.owner = owner
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.store.renew(self.shard_id, self.owner):
+                self.lost = True
+                print(f"\n[WARNING] Lease on '{self.shard_id}' was Lost. Another Worker may Take it Over.")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -1,28 +1,50 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from pipeline_metrics import StageMetrics, file_size
+
+metrics = StageMetrics("hourly_aggregation")
+
 # Set your column names (update as needed)
-col_names = ['date', 'time', 'latitude', 'longitude', 'WV_RADIANCE', 'VIS_ALBEDO', 'VIS_RADIANCE', 'TIR1_TEMP', 'TIR1_RADIANCE', 'TIR2_TEMP', 'TIR2_RADIANCE', 'MIR_RADIANCE', 'SWIR_RADIANCE', 'SAT_AZIMUTH', 'SAT_ELEVATION', 'SUN_AZIMUTH', 'SUN_ELEVATION']
-df = pd.read_csv("Udyogamandal_Eloor.csv", names=col_names, header=None)
+col_names = ['date', 'time', 'latitude', 'longitude', 'WV_RADIANCE', 'VIS_ALBEDO', 'VIS_RADIANCE', 'TIR1_TEMP', 'TIR1_RADIANCE', 'TIR2_TEMP', 'TIR2_RADIANCE', 'MIR_RADIANCE', 'SWIR_RADIANCE', 'SAT_AZIMUTH', 'SAT_ELEVATION', 'SUN_AZIMUTH', 'SUN_ELEVATION', 'QC']
+value_cols = col_names[2:-1]  # 'QC' is a bitmask, not averaged
 
-# Combine date and time into a datetime column
-df['datetime'] = pd.to_datetime(df['date'] + ' ' + df['time'], format='%d-%m-%Y %H:%M', errors='coerce')
+with metrics.stage("load"):
+    df = pd.read_csv("Udyogamandal_Eloor.csv", names=col_names, header=None)
+    metrics.add("rows", len(df))
+    metrics.add("bytes_read", file_size("Udyogamandal_Eloor.csv"))
 
-# Convert all columns except date, time, datetime to numeric
-for col in col_names[2:]:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
+with metrics.stage("aggregate"):
+    # Combine date and time into a datetime column
+    df['datetime'] = pd.to_datetime(df['date'] + ' ' + df['time'], format='%d-%m-%Y %H:%M', errors='coerce')
 
-# Set hour for grouping
-df['hour'] = df['datetime'].dt.floor('h')
+    # Convert all columns except date, time, datetime to numeric
+    for col in value_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
 
-# Group by hour and aggregate (mean for numeric columns)
-agg_dict = {col: 'mean' for col in col_names[2:]}
-result = df.groupby('hour').agg(agg_dict).reset_index()
+    # Set hour for grouping
+    df['hour'] = df['datetime'].dt.floor('h')
+
+    # Group by hour and aggregate (mean for numeric columns)
+    agg_dict = {col: 'mean' for col in value_cols}
+    result = df.groupby('hour').agg(agg_dict).reset_index()
+    metrics.add("rows", len(df))
 
 # Reorder columns
 ordered_cols = ['hour', 'latitude', 'longitude', 'WV_RADIANCE', 'VIS_ALBEDO', 'VIS_RADIANCE', 'TIR1_TEMP', 'TIR1_RADIANCE', 'TIR2_TEMP', 'TIR2_RADIANCE', 'MIR_RADIANCE', 'SWIR_RADIANCE', 'SAT_AZIMUTH', 'SAT_ELEVATION', 'SUN_AZIMUTH', 'SUN_ELEVATION']
 result = result[ordered_cols]
 
-# Save result
-result.to_csv("hourly_Udyogamandal_Eloor.csv", index=False)
-print("✅ Aggregation complete: Saved as hourly_Udyogamandal_Eloor.csv with updated headings")
\ No newline at end of file
+with metrics.stage("write"):
+    # Save result
+    result.to_csv("hourly_Udyogamandal_Eloor.csv", index=False)
+    metrics.add("rows", len(result))
+    metrics.add("bytes_written", file_size("hourly_Udyogamandal_Eloor.csv"))
+print("✅ Aggregation complete: Saved as hourly_Udyogamandal_Eloor.csv with updated headings")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
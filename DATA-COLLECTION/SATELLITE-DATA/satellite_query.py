@@ -0,0 +1,277 @@
+"""
+Point and area queries over a folder of INSAT-3D granules.
+
+    archive = SatelliteArchive("unprocessed-data/new_jan")
+    series = archive.get_series(10.07, 76.30, "2024-01-01", "2024-01-07", ["TIR1_TEMP", "VIS_ALBEDO"])
+    area = archive.get_area(KERALA_BBOX, "2024-01-03 06:00")
+
+Pixels are located with the same projection and calibrated with the same LUTs
+as allstation-data_processing.py. Raw counts are read in square tiles of --tile
+pixels, and the count tiles and LUTs are kept in a bounded LRU cache. A count
+tile serves every band calibrated from it (TIR1_TEMP and TIR1_RADIANCE both come
+from IMG_TIR1), and nearby points and overlapping time ranges are answered from
+memory, without new HDF5 reads.
+
+    python satellite_query.py unprocessed-data/new_jan --point 10.07 76.30 --start 2024-01-01 --end 2024-01-07
+    python satellite_query.py unprocessed-data/new_jan --bbox 8 13 74.8 77.5 --time "2024-01-03 06:00" --output area.nc
+"""
+import os
+import sys
+import bisect
+import argparse
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from insat3d import (SATELLITE_COLUMNS, latandlong_to_pixels, bbox_to_window, pixel_latitudes, pixel_longitudes,
+                     granule_time, calibrate, fill_value_of)
+
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pipeline_metrics import StageMetrics
+
+DEFAULT_BANDS = list(SATELLITE_COLUMNS)
+TILE_SIZE = 64  # pixels per tile side; one tile of one count dataset is 8 KB of uint16
+CACHE_MB = 256
+MAX_OPEN_FILES = 8
+
+metrics = StageMetrics("satellite_query")
+
+
+class LRUCache:
+    """Dictionary that drops its least recently used entries beyond 'max_bytes'."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """Cached value of 'key', calling load() on a miss."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        value = load()
+        self.entries[key] = value
+        self.nbytes += value.nbytes
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, dropped = self.entries.popitem(last=False)
+            self.nbytes -= dropped.nbytes
+        return value
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+                "mb": round(self.nbytes / 2**20, 1), "max_mb": round(self.max_bytes / 2**20, 1)}
+
+
+class SatelliteArchive:
+    """Time-indexed folder of granules with cached, calibrated tile reads."""
+
+    def __init__(self, folder, tile_size=TILE_SIZE, cache_mb=CACHE_MB, max_open_files=MAX_OPEN_FILES):
+        self.folder = folder
+        self.tile_size = tile_size
+        self.cache = LRUCache(cache_mb * 2**20)
+        self.max_open_files = max_open_files
+        self.files = OrderedDict()
+        self.fill_values = {}
+
+        granules = []
+        for fname in os.listdir(folder):
+            ts = granule_time(fname) if fname.endswith(".h5") else None
+            if ts is not None:
+                granules.append((ts, os.path.join(folder, fname)))
+        granules.sort()
+        self.times = [ts for ts, _ in granules]
+        self.paths = [path for _, path in granules]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+
+    # ----------------------------------------------------------- reads ----
+
+    def _open(self, path):
+        """Open h5py.File, keeping the most recently used ones open."""
+        if path in self.files:
+            self.files.move_to_end(path)
+            return self.files[path]
+        f = h5py.File(path, "r")
+        metrics.add("h5_open")
+        self.files[path] = f
+        if len(self.files) > self.max_open_files:
+            _, oldest = self.files.popitem(last=False)
+            oldest.close()
+        return f
+
+    def _lut(self, path, lut_name):
+        def load():
+            metrics.add("h5_read")
+            return np.asarray(self._open(path)[lut_name][()], dtype=np.float32)
+        return self.cache.get(("lut", path, lut_name), load)
+
+    def _fill_value(self, path, count_name):
+        key = (path, count_name)
+        if key not in self.fill_values:
+            self.fill_values[key] = fill_value_of(self._open(path)[count_name])
+        return self.fill_values[key]
+
+    def _count_tile(self, path, count_name, tile_row, tile_col):
+        """Raw counts of one count dataset for one tile of the disk."""
+        def load():
+            row0, col0 = tile_row * self.tile_size, tile_col * self.tile_size
+            counts = self._open(path)[count_name][0, row0:row0 + self.tile_size, col0:col0 + self.tile_size]
+            metrics.add("h5_read")
+            return counts
+        return self.cache.get(("counts", path, count_name, tile_row, tile_col), load)
+
+    def read_counts(self, path, count_name, window):
+        """Raw counts of one count dataset for a (row0, row1, col0, col1) window, assembled from tiles."""
+        row0, row1, col0, col1 = window
+        out = None
+        size = self.tile_size
+        for tile_row in range(row0 // size, (row1 - 1) // size + 1):
+            for tile_col in range(col0 // size, (col1 - 1) // size + 1):
+                tile = self._count_tile(path, count_name, tile_row, tile_col)
+                if out is None:
+                    out = np.empty((row1 - row0, col1 - col0), dtype=tile.dtype)
+                # Overlap of the tile with the window, in disk coordinates
+                r0, r1 = max(row0, tile_row * size), min(row1, tile_row * size + tile.shape[0])
+                c0, c1 = max(col0, tile_col * size), min(col1, tile_col * size + tile.shape[1])
+                out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = \
+                    tile[r0 - tile_row * size:r1 - tile_row * size, c0 - tile_col * size:c1 - tile_col * size]
+        return out
+
+    def read_window(self, path, band, window):
+        """Calibrated values of one band for a (row0, row1, col0, col1) window (float32, NaN for fill)."""
+        count_name, lut_name = SATELLITE_COLUMNS[band]
+        counts = self.read_counts(path, count_name, window)
+        return calibrate(counts, self._lut(path, lut_name), self._fill_value(path, count_name))
+
+    # --------------------------------------------------------- queries ----
+
+    def granules_between(self, start, end):
+        """(time, path) of the granules scanned in [start, end]."""
+        start, end = pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()
+        lo, hi = bisect.bisect_left(self.times, start), bisect.bisect_right(self.times, end)
+        return list(zip(self.times[lo:hi], self.paths[lo:hi]))
+
+    def nearest_granule(self, time, tolerance_minutes=30):
+        """(time, path) of the granule closest to 'time', None if none is within the tolerance."""
+        time = pd.Timestamp(time).to_pydatetime()
+        i = bisect.bisect_left(self.times, time)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self.times)]
+        if not candidates:
+            return None
+        j = min(candidates, key=lambda j: abs(self.times[j] - time))
+        if abs(self.times[j] - time) > pd.Timedelta(minutes=tolerance_minutes):
+            return None
+        return self.times[j], self.paths[j]
+
+    def get_series(self, lat, lon, start, end, bands=None):
+        """Values of 'bands' at the pixel of (lat, lon) for every granule in [start, end], indexed by time."""
+        bands = bands or DEFAULT_BANDS
+        row, col = latandlong_to_pixels(lat, lon)
+        window = (row, row + 1, col, col + 1)
+
+        times, rows = [], []
+        with metrics.stage("series"):
+            for ts, path in self.granules_between(start, end):
+                try:
+                    rows.append([self.read_window(path, band, window)[0, 0] for band in bands])
+                except (OSError, KeyError) as e:
+                    print(f"[WARNING] Skipping {os.path.basename(path)}: {e}")
+                    continue
+                times.append(ts)
+                metrics.add("granules")
+        series = pd.DataFrame(rows, columns=bands, index=pd.DatetimeIndex(times, name="time"), dtype=np.float32)
+        series.attrs.update(latitude=lat, longitude=lon, row=row, col=col)
+        return series
+
+    def get_area(self, bbox, time, bands=None, tolerance_minutes=30):
+        """
+        Calibrated 'bands' over a (lat_min, lat_max, lon_min, lon_max) box from the granule
+        nearest to 'time', as an xarray Dataset on the pixel-centre latitudes/longitudes.
+        """
+        import xarray as xr
+
+        bands = bands or DEFAULT_BANDS
+        found = self.nearest_granule(time, tolerance_minutes)
+        if found is None:
+            raise ValueError(f"No granule within {tolerance_minutes} min of {time}")
+        ts, path = found
+
+        row0, row1, col0, col1 = window = bbox_to_window(bbox)
+        with metrics.stage("area"):
+            data = {band: (("latitude", "longitude"), self.read_window(path, band, window)) for band in bands}
+            metrics.add("granules")
+            metrics.add("rows", (row1 - row0) * (col1 - col0))
+        return xr.Dataset(
+            data,
+            coords={"latitude": pixel_latitudes(np.arange(row0, row1)),
+                    "longitude": pixel_longitudes(np.arange(col0, col1))},
+            attrs={"time": ts.isoformat(), "granule": os.path.basename(path)},
+        )
+
+    def cache_info(self):
+        return dict(self.cache.info(), open_files=len(self.files))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point time series or area snapshots from a folder of INSAT-3D granules")
+    parser.add_argument("folder", help="Folder containing the .h5 granules")
+    parser.add_argument("--point", nargs=2, type=float, metavar=("LAT", "LON"), help="Time series at this location")
+    parser.add_argument("--start", default="1900-01-01", help="First scan time of the series")
+    parser.add_argument("--end", default="2100-01-01", help="Last scan time of the series")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"),
+                        help="Area snapshot of this box")
+    parser.add_argument("--time", default="", help="Scan time of the area snapshot (nearest granule)")
+    parser.add_argument("--bands", nargs="+", choices=DEFAULT_BANDS, default=DEFAULT_BANDS, metavar="BAND",
+                        help="Calibrated bands to return (default: all)")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="Tile side in pixels")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_MB, help="Memory for decoded tiles and LUTs")
+    parser.add_argument("--output", default="", help="CSV (series) or NetCDF (area) to write; printed if not set")
+    args = parser.parse_args()
+
+    if bool(args.point) == bool(args.bbox):
+        parser.error("give either --point or --bbox")
+    if args.bbox and not args.time:
+        parser.error("--bbox needs --time")
+
+    with SatelliteArchive(args.folder, args.tile, args.cache_mb) as archive:
+        print(f"{len(archive.paths)} granules in {args.folder}")
+        if args.point:
+            result = archive.get_series(args.point[0], args.point[1], args.start, args.end, args.bands)
+            if args.output:
+                result.to_csv(args.output)
+            else:
+                print(result.to_string())
+        else:
+            result = archive.get_area(tuple(args.bbox), args.time, args.bands)
+            if args.output:
+                result.to_netcdf(args.output)
+            else:
+                print(result)
+        if args.output:
+            print(f"✅ Saved {args.output}")
+        print(f"Cache: {archive.cache_info()}")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Times every pipeline stage on synthetic data at configurable scales.
+
+    python run_benchmarks.py --scales 8x5x1 96x5x1 96x50x3 --output bench_results.json
+
+A scale is FILESxSTATIONSxMONTHS (granules per month x stations x months).
+Each stage script is run unchanged in a scratch directory with
+PIPELINE_METRICS set, so the results include both the end-to-end wall time
+and the per-stage counters recorded by pipeline_metrics.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import synthetic_data
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_COLLECTION = os.path.dirname(BENCH_DIR)
+REPO_ROOT = os.path.dirname(DATA_COLLECTION)
+
+SATELLITE = os.path.join(DATA_COLLECTION, "SATELLITE-DATA")
+METEO = os.path.join(DATA_COLLECTION, "METEOLOGICAL&PM2.5")
+
+# Station whose tables are carried through the single-station merge scripts
+MERGE_STATION = "Udyogamandal_Eloor"
+
+
+def copy_input(src, dst):
+    def prepare(workdir):
+        shutil.copyfile(os.path.join(workdir, src), os.path.join(workdir, dst))
+    return prepare
+
+
+# (stage name, script, extra arguments, preparation step run in the scratch dir)
+STAGES = [
+    ("satellite_extraction",
+     os.path.join(SATELLITE, "allstation-data_processing.py"),
+     ["--folder", "granules", "--stations", "stations.csv"], None),
+    ("blh_extraction",
+     os.path.join(METEO, "BLH-UNPROCESSED", "BLH_EXTRACT.py"), [], None),
+    ("hourly_aggregation",
+     os.path.join(SATELLITE, "processed-data", "JAN", "sui.py"), [],
+     copy_input(f"{MERGE_STATION}newjannew.csv", f"{MERGE_STATION}.csv")),
+    ("blh_merge",
+     os.path.join(METEO, "DATA-PROCESSED(BLH+OTHER)", "MERGE_BLHandOTHERS.py"), [], None),
+    ("final_merge",
+     os.path.join(DATA_COLLECTION, "final.py"), [], None),
+    ("ml_model",
+     os.path.join(REPO_ROOT, "ML_MODEL", "ml_model.py"), ["--no-plot"], None),
+]
+
+
+def parse_scale(text):
+    try:
+        files, stations, months = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Scale must look like FILESxSTATIONSxMONTHS, got '{text}'")
+    return files, stations, months
+
+
+def make_fixtures(workdir, files, stations, months, start, compress):
+    timings = {}
+    t0 = time.perf_counter()
+    synthetic_data.make_granules(os.path.join(workdir, "granules"), start, months, files, compress=compress)
+    timings["granules_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    synthetic_data.make_stations(os.path.join(workdir, "stations.csv"), stations)
+    synthetic_data.make_era5(os.path.join(workdir, "data.nc"), start, months)
+    synthetic_data.make_cpcb(os.path.join(workdir, "output.csv"), start, months)
+    timings["tables_s"] = time.perf_counter() - t0
+    return timings
+
+
+def last_metrics_record(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_stage(name, script, extra_args, prepare, workdir):
+    metrics_path = os.path.join(workdir, f"metrics_{name}.jsonl")
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)
+
+    env = dict(os.environ, PIPELINE_METRICS=metrics_path, MPLBACKEND="Agg")
+    if prepare:
+        prepare(workdir)
+
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, script] + extra_args, cwd=workdir, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+
+    result = {"stage": name, "wall_s": wall, "returncode": proc.returncode,
+              "metrics": last_metrics_record(metrics_path)}
+    if proc.returncode != 0:
+        result["stderr"] = proc.stderr[-2000:]
+    return result
+
+
+def run_scale(scale, args):
+    files, stations, months = scale
+    workdir = os.path.join(args.workdir, f"f{files}_s{stations}_m{months}")
+    os.makedirs(workdir, exist_ok=True)
+
+    print(f"\n=== Scale: {files} files/month x {stations} stations x {months} months ===")
+    # Built in a fresh process, so the stages (forked from this one) do not start from its memory high-water mark
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        fixtures = pool.submit(make_fixtures, workdir, files, stations, months, args.start,
+                               not args.no_compress).result()
+    print(f"Fixtures ready (granules: {fixtures['granules_s']:.1f}s, tables: {fixtures['tables_s']:.1f}s)")
+
+    results = []
+    for name, script, extra_args, prepare in STAGES:
+        if args.stages and name not in args.stages:
+            continue
+        result = run_stage(name, script, extra_args, prepare, workdir)
+        status = "ok" if result["returncode"] == 0 else f"FAILED ({result['returncode']})"
+        print(f"{name:<22} {result['wall_s']:>8.2f}s  {status}")
+        results.append(result)
+        if result["returncode"] != 0:
+            print(result["stderr"])
+            break
+
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"files_per_month": files, "stations": stations, "months": months,
+            "fixtures": fixtures, "stages": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the PM2.5 pipeline on synthetic INSAT-3D/ERA5/CPCB data.")
+    parser.add_argument("--scales", nargs="+", type=parse_scale, default=[parse_scale("8x5x1")],
+                        help="One or more FILESxSTATIONSxMONTHS scales (default: 8x5x1)")
+    parser.add_argument("--stages", nargs="*", default=[], help="Only run these stages")
+    parser.add_argument("--start", type=lambda s: datetime.strptime(s, "%Y-%m"), default=datetime(2024, 1, 1),
+                        help="First month of synthetic data, YYYY-MM (default: 2024-01)")
+    parser.add_argument("--workdir", default=os.path.join(BENCH_DIR, "bench-work"), help="Scratch directory")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--no-compress", action="store_true", help="Write uncompressed granules")
+    parser.add_argument("--keep", action="store_true", help="Keep fixtures and outputs after the run")
+    args = parser.parse_args()
+
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "scales": [run_scale(scale, args) for scale in args.scales],
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
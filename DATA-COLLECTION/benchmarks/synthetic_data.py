@@ -0,0 +1,263 @@
+"""
+Synthetic fixtures for benchmarking the pipeline without MOSDAC credentials.
+
+Generates INSAT-3D 3RIMG L1C granules with the same HDF5 layout the
+extractor reads, an ERA5 single-levels NetCDF file and CPCB station tables.
+"""
+import os
+import sys
+import csv
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Pixel projection and sun/satellite geometry of the extractor live in SATELLITE-DATA/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SATELLITE-DATA"))
+from geometry import solar_angles, satellite_angles
+from insat3d import pixel_latitudes, pixel_longitudes
+
+# Real granule layout
+NROWS, NCOLS = 3207, 3062
+COUNT_LEVELS = 1024  # 10-bit counts
+FILL_COUNT = 1023
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN",
+          "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+# Band -> {LUT dataset suffix: (value at count 0, value at the last count)}
+BAND_LUTS = {
+    "WV": {"RADIANCE": (0.0, 1.6)},
+    "VIS": {"ALBEDO": (0.0, 100.0), "RADIANCE": (0.0, 600.0)},
+    "TIR1": {"TEMP": (330.0, 180.0), "RADIANCE": (12.0, 1.0)},
+    "TIR2": {"TEMP": (330.0, 180.0), "RADIANCE": (13.0, 1.2)},
+    "MIR": {"RADIANCE": (0.0, 1.2)},
+    "SWIR": {"RADIANCE": (0.0, 150.0)},
+}
+
+ANGLE_DATASETS = ["Sun_Azimuth", "Sun_Elevation", "Sat_Azimuth", "Sat_Elevation"]
+
+# Angles are stored as scaled uint16 counts, decoded by geometry.stored_angles()
+ANGLE_SCALE = 0.01
+ANGLE_OFFSETS = {"Sun_Azimuth": 0.0, "Sun_Elevation": -90.0, "Sat_Azimuth": 0.0, "Sat_Elevation": -90.0}
+ANGLE_FILL = 65535
+
+# Clear-sky count ranges, kept inside insat3d's clear thresholds even after the per-granule shift:
+# TIR 140-340 is ~280-310 K (> 265 K), VIS 60-220 is ~6-22 % albedo (< 40 %)
+CLEAR_COUNTS = {"TIR1": (140, 340), "TIR2": (140, 340), "VIS": (60, 220)}
+# Cloud tops: ~235 K and ~60 % albedo, flagged QC_CLOUD_BT | QC_CLOUD_VIS
+CLOUD_COUNTS = {"TIR1": 650, "TIR2": 640, "VIS": 620}
+CLOUD_FRACTION = 0.05
+CLOUD_CELL = 64  # pixels per side of a cloudy cell
+
+# The real monitoring stations, synthetic ones are scattered around them
+STATIONS = [
+    ("Plammoodu_Thiruvananthapuram", 8.5149093, 76.9435879),
+    ("Kariavattom_Thiruvananthapuram", 8.563700, 76.886500),
+    ("Polayathode_Kollam", 8.8787, 76.6073),
+    ("Udyogamandal_Eloor", 10.073232, 76.302765),
+    ("CorporationGround_Thrissur", 10.532400, 76.215900),
+]
+
+# Kerala window used for the ERA5 fixture (0.25 degree grid, like the CDS download)
+ERA5_LAT = (13.0, 8.0)
+ERA5_LON = (74.5, 77.5)
+ERA5_STEP = 0.25
+
+
+def granule_name(ts):
+    """Filename in the form parsed by extract_datetime(), e.g. 3RIMG_01JAN2024_0015_L1C_SGP_V01R00.h5"""
+    return f"3RIMG_{ts:%d}{MONTHS[ts.month - 1]}{ts:%Y}_{ts:%H%M}_L1C_SGP_V01R00.h5"
+
+
+def month_starts(start, months):
+    starts = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        starts.append(datetime(year, month, 1))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return starts
+
+
+def granule_times(start, months, files_per_month):
+    """Evenly spaced scan times (rounded to 15 min like the real schedule) within each month."""
+    times = []
+    for first in month_starts(start, months):
+        next_month = month_starts(first, 2)[1]
+        span = (next_month - first).total_seconds()
+        step = span / max(files_per_month, 1)
+        for i in range(files_per_month):
+            ts = first + timedelta(seconds=i * step)
+            ts = ts.replace(minute=(ts.minute // 15) * 15, second=0, microsecond=0)
+            times.append(ts + timedelta(minutes=15))
+    return times
+
+
+def base_fields(seed=0):
+    """Smooth clear-sky count fields shared by all granules (cheap to generate and to compress)."""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(0, 6 * np.pi, NROWS, dtype=np.float32)[:, None]
+    cols = np.linspace(0, 4 * np.pi, NCOLS, dtype=np.float32)[None, :]
+    fields = {}
+    for i, band in enumerate(BAND_LUTS):
+        lo, hi = CLEAR_COUNTS.get(band, (150, 750))
+        pattern = (np.sin(rows + i) * np.cos(cols - i) + 1) / 2
+        noise = rng.integers(0, 8, size=(NROWS, NCOLS), dtype=np.int16)
+        fields[band] = (lo + (hi - lo - 8) * pattern + noise).astype(np.int16)
+    return fields
+
+
+def cloud_mask(ts, cloud_fraction=CLOUD_FRACTION):
+    """Cloudy pixels of the granule scanned at 'ts': random CLOUD_CELL-sized cells, 'cloud_fraction' of the disk."""
+    rng = np.random.default_rng(int(ts.timestamp()))
+    cells = rng.random((-(-NROWS // CLOUD_CELL), -(-NCOLS // CLOUD_CELL))) < cloud_fraction
+    return np.repeat(np.repeat(cells, CLOUD_CELL, axis=0), CLOUD_CELL, axis=1)[:NROWS, :NCOLS]
+
+
+def view_angles():
+    """Satellite (azimuth, elevation) of every pixel, in degrees; fixed for a geostationary imager."""
+    lats = pixel_latitudes(np.arange(NROWS))[:, None]
+    lons = pixel_longitudes(np.arange(NCOLS))[None, :]
+    azimuth, elevation = satellite_angles(lats, lons)
+    return {"Sat_Azimuth": azimuth, "Sat_Elevation": elevation}
+
+
+def sun_angles(ts):
+    """Sun (azimuth, elevation) of every pixel at scan time 'ts', in degrees."""
+    lats = pixel_latitudes(np.arange(NROWS))[:, None]
+    lons = pixel_longitudes(np.arange(NCOLS))[None, :]
+    azimuth, elevation = solar_angles(ts, lats, lons)
+    return {"Sun_Azimuth": azimuth, "Sun_Elevation": elevation}
+
+
+def angle_counts(name, degrees):
+    """Degrees -> the stored uint16 counts of angle dataset 'name'."""
+    counts = np.rint((np.asarray(degrees) - ANGLE_OFFSETS[name]) / ANGLE_SCALE)
+    return np.clip(counts, 0, ANGLE_FILL - 1).astype(np.uint16)
+
+
+def write_granule(path, ts, fields, view, compress=True, cloud_fraction=CLOUD_FRACTION):
+    import h5py
+
+    shift = (ts.hour * 4 + ts.minute // 15) % 64
+    cloudy = cloud_mask(ts, cloud_fraction)
+    angles = dict(view, **sun_angles(ts))
+    kwargs = {"compression": "gzip", "compression_opts": 1, "chunks": (1, 256, 256)} if compress else {}
+
+    with h5py.File(path, "w") as f:
+        f.attrs["Acquisition_Start_Time"] = ts.strftime("%d-%b-%YT%H:%M:%S")
+        f.attrs["Satellite_Name"] = "INSAT-3D"
+
+        for band, luts in BAND_LUTS.items():
+            counts = np.clip(fields[band] + shift, 0, FILL_COUNT - 1).astype(np.uint16)
+            if band in CLOUD_COUNTS:
+                counts[cloudy] = CLOUD_COUNTS[band]
+            counts[:, :4] = FILL_COUNT  # off-disk fill columns
+            ds = f.create_dataset(f"IMG_{band}", data=counts[None, :, :], **kwargs)
+            ds.attrs["_FillValue"] = np.uint16(FILL_COUNT)
+
+            for suffix, (lo, hi) in luts.items():
+                lut = np.linspace(lo, hi, COUNT_LEVELS, dtype=np.float32)
+                f.create_dataset(f"IMG_{band}_{suffix}", data=lut)
+
+        for name in ANGLE_DATASETS:
+            counts = angle_counts(name, angles[name])
+            counts[:, :4] = ANGLE_FILL
+            ds = f.create_dataset(name, data=counts[None, :, :], **kwargs)
+            ds.attrs["units"] = "degree"
+            ds.attrs["scale_factor"] = np.float32(ANGLE_SCALE)
+            ds.attrs["add_offset"] = np.float32(ANGLE_OFFSETS[name])
+            ds.attrs["_FillValue"] = np.uint16(ANGLE_FILL)
+
+
+def make_granules(folder, start, months, files_per_month, compress=True, cloud_fraction=CLOUD_FRACTION):
+    """Writes the synthetic granules into 'folder' and returns their paths."""
+    os.makedirs(folder, exist_ok=True)
+    fields = base_fields()
+    view = view_angles()
+    paths = []
+    for ts in granule_times(start, months, files_per_month):
+        path = os.path.join(folder, granule_name(ts))
+        if not os.path.exists(path):
+            write_granule(path, ts, fields, view, compress=compress, cloud_fraction=cloud_fraction)
+        paths.append(path)
+    return paths
+
+
+def make_stations(path, n_stations, seed=0):
+    """Writes a name,lat,lon CSV with the real stations first and synthetic ones after."""
+    rng = np.random.default_rng(seed)
+    rows = list(STATIONS[:n_stations])
+    for i in range(len(rows), n_stations):
+        lat = rng.uniform(8.3, 12.5)
+        lon = rng.uniform(75.0, 77.2)
+        rows.append((f"Synthetic_{i:04d}", round(lat, 6), round(lon, 6)))
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "lat", "lon"])
+        writer.writerows(rows)
+    return rows
+
+
+def hourly_index(start, months):
+    first = month_starts(start, months)[0]
+    end = month_starts(start, months + 1)[-1]
+    return pd.date_range(first, end, freq="h", inclusive="left")
+
+
+def make_era5(path, start, months, seed=0):
+    """ERA5 single-levels style NetCDF with blh, t2m, d2m, u10 and v10 (dims time/latitude/longitude)."""
+    import xarray as xr
+
+    rng = np.random.default_rng(seed)
+    times = hourly_index(start, months)
+    lats = np.arange(ERA5_LAT[0], ERA5_LAT[1] - ERA5_STEP / 2, -ERA5_STEP)
+    lons = np.arange(ERA5_LON[0], ERA5_LON[1] + ERA5_STEP / 2, ERA5_STEP)
+    shape = (len(times), len(lats), len(lons))
+
+    hour = times.hour.values[:, None, None]
+    diurnal = np.sin((hour - 6) / 24 * 2 * np.pi)
+    data = {
+        "blh": 600 + 500 * diurnal + rng.normal(0, 50, shape),
+        "t2m": 300 + 4 * diurnal + rng.normal(0, 0.5, shape),
+        "d2m": 295 + 1 * diurnal + rng.normal(0, 0.5, shape),
+        "u10": rng.normal(1.5, 1.0, shape),
+        "v10": rng.normal(-0.5, 1.0, shape),
+    }
+    units = {"blh": "m", "t2m": "K", "d2m": "K", "u10": "m s**-1", "v10": "m s**-1"}
+
+    ds = xr.Dataset(
+        {name: (("time", "latitude", "longitude"), values.astype(np.float32), {"units": units[name]})
+         for name, values in data.items()},
+        coords={"time": times, "latitude": lats, "longitude": lons},
+    )
+    ds.to_netcdf(path)
+    return path
+
+
+def make_cpcb(path, start, months, seed=0, missing_fraction=0.02):
+    """CPCB hourly table as written by csvpro.py ('From Date' + met/PM2.5 columns, "None" for gaps)."""
+    rng = np.random.default_rng(seed)
+    times = hourly_index(start, months)
+    n = len(times)
+    hour = times.hour.values
+    df = pd.DataFrame({
+        "From Date": times.strftime("%d-%m-%Y %H:%M"),
+        "PM2.5": np.clip(35 + 15 * np.cos((hour - 8) / 24 * 2 * np.pi) + rng.normal(0, 8, n), 1, None),
+        "RH": np.clip(rng.normal(75, 10, n), 10, 100),
+        "WS": np.abs(rng.normal(1.2, 0.6, n)),
+        "WD": rng.uniform(0, 360, n),
+        "AT": rng.normal(28, 2, n),
+        "RF": np.where(rng.random(n) < 0.1, rng.exponential(2, n), 0.0),
+        "TOT-RF": 0.0,
+    })
+    df["TOT-RF"] = df["RF"].cumsum()
+
+    gaps = rng.random(df.shape) < missing_fraction
+    gaps[:, 0] = False
+    df = df.mask(gaps)
+    df.to_csv(path, index=False, na_rep="None")
+    return path
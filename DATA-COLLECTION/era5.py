@@ -0,0 +1,86 @@
+"""
+ERA5 single-level fields at station points, interpolated in time.
+
+ERA5 is hourly while INSAT-3D scans every 15-30 minutes, so instead of
+averaging the satellite data down to the hour the ERA5 values are linearly
+interpolated to each scan time. Every variable is read once as a
+(time, station) array and all target timestamps are interpolated in one
+vectorized pass.
+"""
+import numpy as np
+
+
+def open_era5(path):
+    """Opens a NetCDF, or a GRIB file through cfgrib."""
+    import xarray as xr
+
+    if path.endswith((".grib", ".grb", ".grib2")):
+        return xr.open_dataset(path, engine="cfgrib")
+    return xr.open_dataset(path)
+
+
+def era5_time_name(ds):
+    return "valid_time" if "valid_time" in ds.coords else "time"
+
+
+def field_variables(ds):
+    """Data variables on the (time, latitude, longitude) grid - blh, t2m, u10, ... whatever was downloaded."""
+    tname = era5_time_name(ds)
+    return [name for name, da in ds.data_vars.items()
+            if {tname, "latitude", "longitude"} <= set(da.dims)]
+
+
+def time_weights(times, targets):
+    """
+    Index of the ERA5 step before each target and the weight of the step after it.
+    Targets outside the file's time range get weight NaN. A file with a single step
+    only covers that step: its targets get index 0 and weight 0 (see next_step()).
+    """
+    times = np.asarray(times, dtype="datetime64[ns]")
+    targets = np.asarray(targets, dtype="datetime64[ns]")
+    if len(times) == 0:
+        raise ValueError("ERA5 file has no time steps")
+    if len(times) == 1:
+        return np.zeros(targets.shape, dtype=np.intp), np.where(targets == times[0], 0.0, np.nan)
+    i1 = np.clip(np.searchsorted(times, targets), 1, len(times) - 1)
+    t0, t1 = times[i1 - 1], times[i1]
+    w = (targets - t0) / (t1 - t0)
+    w = np.where((targets < times[0]) | (targets > times[-1]) | np.isnat(targets), np.nan, w)
+    return i1 - 1, w
+
+
+def next_step(i0, n_times):
+    """Index of the step after 'i0' (the step itself for a single-step file, where its weight is 0)."""
+    return np.minimum(i0 + 1, n_times - 1)
+
+
+def station_series(ds, lats, lons, variables):
+    """{variable: (time, station) array} at the grid points nearest to each station."""
+    import xarray as xr
+
+    points = {"latitude": xr.DataArray(np.asarray(lats), dims="station"),
+              "longitude": xr.DataArray(np.asarray(lons), dims="station")}
+    tname = era5_time_name(ds)
+    series = {}
+    for var in variables:
+        da = ds[var].sel(points, method="nearest").transpose(tname, "station", ...)
+        series[var] = da.values.reshape(da.shape[0], da.shape[1]).astype(np.float32)
+    return series
+
+
+def interpolate_at(ds, lats, lons, station_index, targets, variables=None):
+    """
+    ERA5 values for arbitrary (station, time) samples.
+
+    'lats'/'lons' list the stations; 'station_index[k]' and 'targets[k]' give the
+    station and UTC timestamp of sample k. Returns {variable: values per sample}.
+    """
+    variables = variables or field_variables(ds)
+    series = station_series(ds, lats, lons, variables)
+    times = ds[era5_time_name(ds)].values
+    i0, w = time_weights(times, targets)
+    i1 = next_step(i0, len(times))
+    station_index = np.asarray(station_index)
+    w = w.astype(np.float32)
+    return {var: (1 - w) * values[i0, station_index] + w * values[i1, station_index]
+            for var, values in series.items()}
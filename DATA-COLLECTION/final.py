@@ -1,21 +1,42 @@
+import os
+import sys
 import pandas as pd
 
-# Load main dataset
-main_df = pd.read_csv("merged_output.csv")
-main_df['From Date'] = pd.to_datetime(main_df['From Date'], errors='coerce')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from pipeline_metrics import StageMetrics, file_size
+from schema import read_table, memory_mb
 
-# Load hourly satellite dataset
-hourly_df = pd.read_csv("hourly_Udyogamandal_Eloor.csv")
-hourly_df['hour'] = pd.to_datetime(hourly_df['hour'], errors='coerce')
+metrics = StageMetrics("final_merge")
 
-# Merge on datetime
-merged = pd.merge(main_df, hourly_df, left_on='From Date', right_on='hour', how='inner')
+with metrics.stage("load"):
+    # Load main dataset ("None" placeholders become NaN, values float32, dates datetime64)
+    main_df = read_table("merged_output.csv")
 
-# Remove rows with any None/NaN values
-merged_clean = merged.dropna()
-merged_clean = merged_clean.drop(columns=['hour','latitude','longitude'])
+    # Load hourly satellite dataset
+    hourly_df = read_table("hourly_Udyogamandal_Eloor.csv")
 
-# Save result
-merged_clean.to_csv("merged_final_no_none_final.csv", index=False, na_rep="None")
+    metrics.add("rows", len(main_df) + len(hourly_df))
+    metrics.add("bytes_read", file_size("merged_output.csv") + file_size("hourly_Udyogamandal_Eloor.csv"))
+    metrics.gauge("frame_mb", memory_mb(main_df) + memory_mb(hourly_df))
 
-print("✅ Merge complete: Saved as merged_final_no_none.csv (rows with None/NaN removed)")
\ No newline at end of file
+with metrics.stage("merge"):
+    # Merge on datetime
+    merged = pd.merge(main_df, hourly_df, left_on='From Date', right_on='hour', how='inner')
+
+    # Remove rows with any None/NaN values
+    merged_clean = merged.dropna()
+    merged_clean = merged_clean.drop(columns=['hour','latitude','longitude'])
+    metrics.add("rows", len(merged))
+    metrics.gauge("frame_mb", memory_mb(merged) + memory_mb(merged_clean))
+
+with metrics.stage("write"):
+    # Save result
+    merged_clean.to_csv("merged_final_no_none_final.csv", index=False, na_rep="None")
+    metrics.add("rows", len(merged_clean))
+    metrics.add("bytes_written", file_size("merged_final_no_none_final.csv"))
+
+print("✅ Merge complete: Saved as merged_final_no_none.csv (rows with None/NaN removed)")
+
+if metrics.enabled:
+    metrics.write()
+    print(metrics.summary())
@@ -0,0 +1,77 @@
+"""
+Optional live metrics endpoint for long-running pipeline scripts.
+
+Serves the StageMetrics of the running script in the Prometheus text format,
+so throughput drops and rate-limit pressure show up while a download, an
+extraction or an inference service is still running:
+
+    python mdapi.py --daemon --metrics-port 9101
+    curl http://127.0.0.1:9101/metrics
+
+The port can also come from the PIPELINE_METRICS_PORT environment variable.
+Nothing is started when neither is set.
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT_ENV = "PIPELINE_METRICS_PORT"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def default_port():
+    """Port from PIPELINE_METRICS_PORT, 0 (disabled) if it is not set."""
+    try:
+        return int(os.environ.get(METRICS_PORT_ENV) or 0)
+    except ValueError:
+        print(f"[WARNING] Ignoring Invalid {METRICS_PORT_ENV}: '{os.environ[METRICS_PORT_ENV]}'")
+        return 0
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood the script's own output
+        pass
+
+
+def start_metrics_server(metrics, port=None, host="127.0.0.1"):
+    """
+    Serves 'metrics' on http://host:port/metrics from a background thread.
+    Returns the server (call shutdown() to stop it), or None if no port is set.
+    """
+    port = default_port() if port is None else port
+    if not port:
+        return None
+
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {"metrics": metrics})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        print(f"[WARNING] Metrics Endpoint Not Started on Port {port}: {e}")
+        return None
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"[INFO] Serving Metrics at http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def add_metrics_argument(parser):
+    """Adds the --metrics-port option to a script's argument parser."""
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help=f"Serve live metrics (Prometheus text format) on this local port "
+                             f"(default: ${METRICS_PORT_ENV}, off if unset)")
@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import socket
+import cProfile
+import threading
+from collections import deque
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Not available on Windows
+    HAS_RESOURCE = False
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+try:
+    from pyinstrument import Profiler
+    HAS_PYINSTRUMENT = True
+except ImportError:
+    HAS_PYINSTRUMENT = False
+
+# Environment variables that switch the instrumentation on.
+#   PIPELINE_METRICS        -> JSON Lines file, one record is appended per run
+#   PIPELINE_PROFILE        -> "cprofile" or "pyinstrument"
+#   PIPELINE_PROFILE_STAGE  -> name of the (hot) stage to profile, all stages if empty
+METRICS_ENV = "PIPELINE_METRICS"
+PROFILE_ENV = "PIPELINE_PROFILE"
+PROFILE_STAGE_ENV = "PIPELINE_PROFILE_STAGE"
+
+# Counters that get a per-second rate in the report
+RATE_COUNTERS = ("rows", "granules", "bytes_read", "bytes_written", "bytes_downloaded")
+
+# Upper bounds (seconds) of the latency histogram buckets served by prometheus()
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+
+# The live rates served by prometheus() are averaged over this many seconds
+RECENT_WINDOW_S = 60
+
+
+def _proc_status_mb(field):
+    """A 'kB' field of /proc/self/status (Linux) in MB, None if unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB (None if unknown)."""
+    # VmHWM starts over at exec(); ru_maxrss keeps the high-water mark of the process that forked us
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    if HAS_RESOURCE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if HAS_PSUTIL:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    return None
+
+
+def current_rss_mb():
+    """Returns the current resident set size of this process in MB (None if unknown)."""
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def file_size(path):
+    """Size of a file in bytes, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def ensure_parent_dir(path):
+    """Creates the directory a file will be written into, if there is one."""
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+
+class StageMetrics:
+    """
+    Records wall/CPU time, counters (rows, granules, bytes, HDF5 opens/reads)
+    and peak RSS for the named stages of one script run.
+    """
+
+    def __init__(self, script, output=None, profile=None, profile_stage=None):
+        self.script = script
+        self.output = output if output is not None else os.environ.get(METRICS_ENV, "")
+        self.profile = (profile if profile is not None else os.environ.get(PROFILE_ENV, "")).lower()
+        self.profile_stage = profile_stage if profile_stage is not None else os.environ.get(PROFILE_STAGE_ENV, "")
+        self.started = datetime.now()
+        self.stages = {}
+        self.current = None
+        # Read by the metrics endpoint thread (metrics_server.py) while the script runs
+        self.lock = threading.RLock()
+        self.latencies = {}
+        self.recent = {}
+
+    @property
+    def enabled(self):
+        return bool(self.output)
+
+    def _stage_record(self, name):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "counters": {}, "gauges": {}}
+            return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Times everything inside the 'with' block under the given stage name."""
+        record = self._stage_record(name)
+        previous, self.current = self.current, name
+        profiler = self._start_profiler(name)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            with self.lock:
+                record["wall_s"] += wall
+                record["cpu_s"] += time.process_time() - cpu_start
+                record["calls"] += 1
+                record["peak_rss_mb"] = peak_rss_mb()
+            self.observe(name, wall)
+            self._stop_profiler(profiler, name)
+            self.current = previous
+
+    def add(self, counter, value=1, stage=None):
+        """Adds 'value' to a counter of the given (or currently running) stage."""
+        name = stage or self.current or "main"
+        with self.lock:
+            counters = self._stage_record(name)["counters"]
+            counters[counter] = counters.get(counter, 0) + value
+            if counter in RATE_COUNTERS:
+                now = time.time()
+                events = self.recent.setdefault(counter, deque())
+                events.append((now, value))
+                while events[0][0] < now - RECENT_WINDOW_S:
+                    events.popleft()
+
+    def gauge(self, name, value, stage=None):
+        """Records the latest value of a level (e.g. DataFrame memory) for the given stage."""
+        stage = stage or self.current or "main"
+        with self.lock:
+            self._stage_record(stage)["gauges"][name] = value
+
+    def observe(self, name, seconds):
+        """Adds one duration to the latency histogram 'name' (each stage run is recorded under its stage name)."""
+        with self.lock:
+            histogram = self.latencies.setdefault(name, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def recent_rates(self):
+        """Per-second rate of each rate counter over the last RECENT_WINDOW_S seconds."""
+        cutoff = time.time() - RECENT_WINDOW_S
+        rates = {}
+        with self.lock:
+            for counter, events in self.recent.items():
+                while events and events[0][0] < cutoff:
+                    events.popleft()
+                rates[counter] = sum(value for _, value in events) / RECENT_WINDOW_S
+        return rates
+
+    def _start_profiler(self, name):
+        if not self.profile or (self.profile_stage and self.profile_stage != name):
+            return None
+        if self.profile == "pyinstrument":
+            if not HAS_PYINSTRUMENT:
+                print("[INFO] 'pyinstrument' is Not Installed. Falling back to cProfile.")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler, name):
+        if profiler is None:
+            return
+        base = os.path.splitext(self.output)[0] if self.output else self.script
+        stamp = self.started.strftime("%Y%m%d_%H%M%S")
+        ensure_parent_dir(base)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = f"{base}_{name}_{stamp}.prof"
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = f"{base}_{name}_{stamp}.html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        print(f"[INFO] Profile of stage '{name}' saved to {path}")
+
+    def report(self):
+        """Builds the JSON-serialisable record for this run."""
+        stages = {}
+        for name, record in self.stages.items():
+            entry = dict(record)
+            wall = record["wall_s"]
+            for counter in RATE_COUNTERS:
+                if counter in record["counters"] and wall > 0:
+                    entry[f"{counter}_per_s"] = record["counters"][counter] / wall
+            stages[name] = entry
+
+        return {
+            "script": self.script,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": sum(r["wall_s"] for r in self.stages.values()),
+            "cpu_s": sum(r["cpu_s"] for r in self.stages.values()),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+        }
+
+    def prometheus(self):
+        """The current metrics in the Prometheus text exposition format."""
+        script = _label(self.script)
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            stages = {name: (dict(r["counters"]), dict(r["gauges"])) for name, r in self.stages.items()}
+            latencies = {name: dict(h, buckets=list(h["buckets"])) for name, h in self.latencies.items()}
+
+        by_counter, by_gauge = {}, {}
+        for stage, (counters, gauges) in stages.items():
+            for counter, value in counters.items():
+                by_counter.setdefault(counter, []).append((stage, value))
+            for gauge, value in gauges.items():
+                by_gauge.setdefault(gauge, []).append((stage, value))
+
+        for counter, samples in sorted(by_counter.items()):
+            name = f"pipeline_{counter}_total"
+            family(name, "counter", f"'{counter}' counted so far, per stage")
+            for stage, value in samples:
+                lines.append(f'{name}{{script="{script}",stage="{_label(stage)}"}} {value}')
+
+        for gauge, samples in sorted(by_gauge.items()):
+            name = f"pipeline_{gauge}"
+            family(name, "gauge", f"Latest '{gauge}', per stage")
+            for stage, value in samples:
+                lines.append(f'{name}{{script="{script}",stage="{_label(stage)}"}} {value}')
+
+        family("pipeline_recent_rate", "gauge", f"Per-second rate over the last {RECENT_WINDOW_S}s")
+        for counter, rate in sorted(self.recent_rates().items()):
+            lines.append(f'pipeline_recent_rate{{script="{script}",counter="{counter}"}} {rate}')
+
+        family("pipeline_latency_seconds", "histogram", "Duration of stage runs and other timed steps")
+        for name, histogram in sorted(latencies.items()):
+            labels = f'script="{script}",name="{_label(name)}"'
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                lines.append(f'pipeline_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'pipeline_latency_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f'pipeline_latency_seconds_sum{{{labels}}} {histogram["sum"]}')
+            lines.append(f'pipeline_latency_seconds_count{{{labels}}} {histogram["count"]}')
+
+        for name, value, help_text in (("pipeline_rss_mb", current_rss_mb(), "Resident set size in MB"),
+                                       ("pipeline_peak_rss_mb", peak_rss_mb(), "Peak resident set size in MB")):
+            if value is not None:
+                family(name, "gauge", help_text)
+                lines.append(f'{name}{{script="{script}"}} {value}')
+
+        family("pipeline_uptime_seconds", "gauge", "Seconds since the script started")
+        lines.append(f'pipeline_uptime_seconds{{script="{script}"}} {(datetime.now() - self.started).total_seconds()}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """Appends the run record as one JSON line (only if an output file is configured)."""
+        path = path or self.output
+        if not path:
+            return None
+        record = self.report()
+        ensure_parent_dir(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self):
+        """Short human-readable summary, one line per stage."""
+        lines = []
+        for name, entry in self.report()["stages"].items():
+            rates = ", ".join(
+                f"{k[:-6]}/s={entry[k]:,.1f}" for k in entry if k.endswith("_per_s")
+            )
+            gauges = ", ".join(f"{k}={v:,.1f}" for k, v in entry["gauges"].items())
+            details = " ".join(part for part in (rates, gauges) if part)
+            lines.append(f"{name}: wall={entry['wall_s']:.2f}s cpu={entry['cpu_s']:.2f}s {details}".rstrip())
+        return "\n".join(lines)
@@ -0,0 +1,254 @@
+"""
+Time-series cross-validation and hyperparameter search for the PM2.5 model.
+
+A random train_test_split puts neighbouring hours on both sides of the split, so
+the scores are optimistic. The folds here keep time (or stations) apart:
+
+    blocked   k contiguous time blocks; each is tested once, trained on the rest
+              minus a --gap of hours on either side
+    rolling   forward chaining; block i is tested on a model trained on blocks < i
+    station   leave-one-station-out (needs a Station column)
+
+The feature matrix, target and fold indices are written once to --cache as .npy
+files and memory-mapped by every worker process, so the table is not copied to
+each worker. All (configuration, fold) fits run in parallel across --workers.
+
+    python cross_validate.py --data features.csv --folds blocked --engine hgb \
+        --grid '{"learning_rate": [0.05, 0.1], "max_leaf_nodes": [15, 31, 63]}'
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+
+from engines import ENGINES, DEFAULT_ENGINE, build_engine
+from features import TIME_COLUMN, STATION_COLUMN, engineered_columns
+from ml_model import FEATURES, TARGET
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION"))
+from pipeline_metrics import StageMetrics, file_size
+from schema import read_table, memory_mb
+
+metrics = StageMetrics("cross_validation")
+
+DEFAULT_GRIDS = {
+    "rf": {"max_depth": [None, 20], "min_samples_leaf": [1, 5], "max_features": [1.0, 0.5]},
+    "hgb": {"learning_rate": [0.05, 0.1], "max_leaf_nodes": [15, 31, 63], "l2_regularization": [0.0, 1.0]},
+}
+
+
+# ----------------------------------------------------------------- folds ----
+
+def blocked_folds(times, k, gap_hours):
+    order = np.argsort(times, kind="stable")
+    gap = np.timedelta64(int(gap_hours * 3600), "s")
+    folds = []
+    for block in np.array_split(order, k):
+        start, end = times[block].min(), times[block].max()
+        train = np.flatnonzero((times < start - gap) | (times > end + gap))
+        if len(train) and len(block):
+            folds.append((train, np.sort(block)))
+    return folds
+
+
+def rolling_folds(times, k, gap_hours):
+    order = np.argsort(times, kind="stable")
+    gap = np.timedelta64(int(gap_hours * 3600), "s")
+    blocks = np.array_split(order, k + 1)
+    folds = []
+    for block in blocks[1:]:
+        if not len(block):
+            continue
+        start = times[block].min()
+        train = np.flatnonzero(times < start - gap)
+        if len(train):
+            folds.append((train, np.sort(block)))
+    return folds
+
+
+def station_folds(stations):
+    return [(np.flatnonzero(stations != s), np.flatnonzero(stations == s)) for s in pd.unique(stations)]
+
+
+def make_folds(df, scheme, k, gap_hours, time_column=TIME_COLUMN, station_column=STATION_COLUMN):
+    if scheme == "station":
+        if station_column not in df.columns:
+            raise ValueError(f"Leave-one-station-out needs a '{station_column}' column")
+        return station_folds(df[station_column].values)
+    times = pd.to_datetime(df[time_column]).values
+    if np.isnat(times).any():
+        raise ValueError(f"'{time_column}' has unparseable timestamps; drop those rows before building folds")
+    folds = blocked_folds(times, k, gap_hours) if scheme == "blocked" else rolling_folds(times, k, gap_hours)
+    if len(folds) < k:
+        print(f"[WARNING] {k - len(folds)} of {k} '{scheme}' folds skipped: no training rows outside a "
+              f"{gap_hours:g} h gap")
+    if not folds:
+        raise ValueError(f"No '{scheme}' fold has training rows with a {gap_hours:g} h gap; use a smaller --gap")
+    return folds
+
+
+# ----------------------------------------------------------------- cache ----
+
+def cache_key(path, features, scheme, k, gap_hours):
+    stat = os.stat(path)
+    raw = json.dumps([os.path.abspath(path), stat.st_size, stat.st_mtime, list(features), scheme, k, gap_hours])
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def build_cache(cache_dir, df, features, folds):
+    """Writes X (float32), y and the fold indices as .npy files that workers memory-map."""
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(os.path.join(cache_dir, "X.npy"), df[features].to_numpy(dtype=np.float32))
+    np.save(os.path.join(cache_dir, "y.npy"), df[TARGET].to_numpy(dtype=np.float32))
+    for i, (train, test) in enumerate(folds):
+        np.save(os.path.join(cache_dir, f"fold{i}_train.npy"), train)
+        np.save(os.path.join(cache_dir, f"fold{i}_test.npy"), test)
+    with open(os.path.join(cache_dir, "folds.json"), "w") as f:
+        json.dump({"features": list(features), "n_folds": len(folds)}, f)
+
+
+def load_fold_count(cache_dir):
+    path = os.path.join(cache_dir, "folds.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["n_folds"]
+
+
+# --------------------------------------------------------------- workers ----
+
+_worker = {}
+
+
+def _init_worker(cache_dir):
+    # One thread per fit; the parallelism comes from running many fits at once
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    _worker["cache_dir"] = cache_dir
+    _worker["X"] = np.load(os.path.join(cache_dir, "X.npy"), mmap_mode="r")
+    _worker["y"] = np.load(os.path.join(cache_dir, "y.npy"), mmap_mode="r")
+
+
+def _fit_fold(engine, n_estimators, params, fold):
+    cache_dir = _worker["cache_dir"]
+    train = np.load(os.path.join(cache_dir, f"fold{fold}_train.npy"))
+    test = np.load(os.path.join(cache_dir, f"fold{fold}_test.npy"))
+    X, y = _worker["X"], _worker["y"]
+
+    model = build_engine(engine, n_estimators, n_jobs=1, **params)
+    t0 = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    y_pred = model.predict(X[test])
+    predict_s = time.perf_counter() - t0
+    return {"fold": fold, "mse": mean_squared_error(y[test], y_pred), "r2": r2_score(y[test], y_pred),
+            "fit_s": fit_s, "predict_s": predict_s, "train_rows": len(train), "test_rows": len(test)}
+
+
+# ------------------------------------------------------------------ main ----
+
+def parameter_grid(grid):
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def summarise(params, results):
+    mse = np.array([r["mse"] for r in results])
+    r2 = np.array([r["r2"] for r in results])
+    return {
+        "params": params,
+        "mse_mean": float(mse.mean()), "mse_std": float(mse.std()),
+        "r2_mean": float(r2.mean()), "r2_std": float(r2.std()),
+        "fit_s_total": round(sum(r["fit_s"] for r in results), 3),
+        "predict_s_total": round(sum(r["predict_s"] for r in results), 3),
+        "folds": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-series cross-validation and parallel hyperparameter search")
+    parser.add_argument("--data", default="merged_final_no_none_final.csv", help="Joined (or feature) table")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE)
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees (or boosting iterations) per fit")
+    parser.add_argument("--folds", choices=["blocked", "rolling", "station"], default="blocked", help="Fold scheme")
+    parser.add_argument("--k", type=int, default=5, help="Number of time blocks")
+    parser.add_argument("--gap", type=float, default=24, help="Hours left out between train and test blocks")
+    parser.add_argument("--grid", default="", help="JSON {parameter: [values]} (default: a small grid per engine)")
+    parser.add_argument("--engineered", action="store_true", help="Also use the columns added by features.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel fits")
+    parser.add_argument("--cache", default="cv_cache", help="Folder for the memory-mapped fold arrays")
+    parser.add_argument("--report", default="cv_report.json", help="Where the results are written")
+    args = parser.parse_args()
+
+    with metrics.stage("load"):
+        columns = pd.read_csv(args.data, nrows=0).columns
+        features = FEATURES + (engineered_columns(columns) if args.engineered else [])
+        df = read_table(args.data, columns=features + [TARGET, TIME_COLUMN, STATION_COLUMN])
+        metrics.add("bytes_read", file_size(args.data))
+        # Time-based folds cannot place rows whose timestamp did not parse
+        required = features + [TARGET] + ([TIME_COLUMN] if args.folds != "station" else [])
+        df = df.dropna(subset=required).reset_index(drop=True)
+        metrics.add("rows", len(df))
+        metrics.gauge("frame_mb", memory_mb(df))
+
+    cache_dir = os.path.join(args.cache, cache_key(args.data, features, args.folds, args.k, args.gap))
+    n_folds = load_fold_count(cache_dir)
+    if n_folds is None:
+        with metrics.stage("folds"):
+            folds = make_folds(df, args.folds, args.k, args.gap)
+            build_cache(cache_dir, df, features, folds)
+            n_folds = len(folds)
+    else:
+        print(f"Using cached folds in {cache_dir}")
+    del df
+
+    grid = json.loads(args.grid) if args.grid else DEFAULT_GRIDS[args.engine]
+    configs = parameter_grid(grid)
+    print(f"{len(configs)} configurations x {n_folds} '{args.folds}' folds = {len(configs) * n_folds} fits "
+          f"on {args.workers} workers")
+
+    results = {i: [] for i in range(len(configs))}
+    with metrics.stage("search"):
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(cache_dir,)) as pool:
+            futures = {}
+            for i, params in enumerate(configs):
+                for fold in range(n_folds):
+                    futures[pool.submit(_fit_fold, args.engine, args.n_estimators, params, fold)] = i
+            for future, i in futures.items():
+                results[i].append(future.result())
+        metrics.add("rows", sum(r["train_rows"] for rs in results.values() for r in rs))
+
+    summaries = sorted((summarise(configs[i], results[i]) for i in results),
+                       key=lambda s: s["mse_mean"])
+
+    print(f"\n{'MSE':>10} {'±':>7} {'R2':>6} {'fit (s)':>9} {'predict (s)':>12}  params")
+    for s in summaries:
+        print(f"{s['mse_mean']:>10.2f} {s['mse_std']:>7.2f} {s['r2_mean']:>6.2f} {s['fit_s_total']:>9.2f} "
+              f"{s['predict_s_total']:>12.2f}  {json.dumps(s['params'])}")
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"data": os.path.abspath(args.data), "engine": args.engine, "folds": args.folds,
+                   "n_folds": n_folds, "gap_hours": args.gap, "features": features,
+                   "best": summaries[0]["params"], "results": summaries}, f, indent=2)
+    print(f"\n✅ Best: {json.dumps(summaries[0]['params'])} - report saved to {args.report}")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Model engines for the PM2.5 regressor.
+
+Every engine builds a scikit-learn estimator, so fit()/predict() and
+model_store.save_model()/load_model() work the same for all of them:
+
+    rf   RandomForestRegressor (the original model)
+    hgb  HistGradientBoostingRegressor - bins features into histograms, fits much
+         faster on large tables and gives a far smaller model file
+"""
+import io
+
+import joblib
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+DEFAULT_ENGINE = "rf"
+
+
+def build_random_forest(n_estimators=100, n_jobs=-1, **params):
+    # n_jobs=-1 fits (and predicts) the trees on all cores
+    return RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs, **params)
+
+
+def build_hist_gradient_boosting(n_estimators=100, n_jobs=-1, **params):
+    # Boosting iterations play the role of trees; threads come from OpenMP, not n_jobs
+    return HistGradientBoostingRegressor(max_iter=n_estimators, random_state=42, **params)
+
+
+ENGINES = {
+    "rf": build_random_forest,
+    "hgb": build_hist_gradient_boosting,
+}
+
+# Estimator type -> (engine, parameter holding the number of trees / boosting iterations)
+MODEL_TYPES = {
+    "RandomForestRegressor": ("rf", "n_estimators"),
+    "HistGradientBoostingRegressor": ("hgb", "max_iter"),
+}
+
+
+def build_engine(name=DEFAULT_ENGINE, n_estimators=100, n_jobs=-1, **params):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    return ENGINES[name](n_estimators=n_estimators, n_jobs=n_jobs, **params)
+
+
+def engine_name(model):
+    return MODEL_TYPES[type(model).__name__][0]
+
+
+def n_trees(model):
+    return model.get_params()[MODEL_TYPES[type(model).__name__][1]]
+
+
+def grow(model, extra_trees, n_jobs=-1):
+    """Keeps the fitted trees and adds 'extra_trees' new ones on the next fit() (warm start)."""
+    param = MODEL_TYPES[type(model).__name__][1]
+    model.set_params(warm_start=True, **{param: n_trees(model) + extra_trees})
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    return model
+
+
+def model_size(model):
+    """Size in bytes of the model as joblib writes it."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
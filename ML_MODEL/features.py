@@ -0,0 +1,198 @@
+"""
+Lag, rolling-window and time-of-day/season features for the PM2.5 model.
+
+All features are computed per station with grouped, vectorized pandas operations
+and only look at the past (a row's own PM2.5 never leaks into its features):
+
+    <col>_lag<k>h     value k hours earlier (exact timestamp, NaN if that hour is missing)
+    <col>_mean<w>h    mean over the preceding w hours
+    <col>_std<w>h     standard deviation over the preceding w hours
+    hour_sin/cos, doy_sin/cos, season
+
+New hours can be appended with --append: only the new rows plus the trailing
+history their windows need are recomputed.
+
+    python features.py --data merged_final_no_none_final.csv --output features.csv
+    python features.py --append new_hours.csv --output features.csv
+"""
+import os
+import re
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION"))
+from pipeline_metrics import StageMetrics, file_size
+from schema import read_table, apply_schema, memory_mb
+
+TIME_COLUMN = "From Date"
+STATION_COLUMN = "Station"
+
+LAG_HOURS = (1, 2, 3, 24)
+ROLLING_HOURS = (3, 6, 24)
+LAGGED_COLUMNS = ("PM2.5",)
+
+TIME_FEATURES = ["hour_sin", "hour_cos", "doy_sin", "doy_cos", "season"]
+ENGINEERED = re.compile(r"_(lag|mean|std)\d+h$")
+
+# Kerala seasons: winter (Dec-Feb), summer (Mar-May), south-west monsoon (Jun-Sep), north-east monsoon (Oct-Nov)
+SEASON_OF_MONTH = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 2, 3, 3, 0])  # indexed by month 1-12
+
+metrics = StageMetrics("features")
+
+
+def engineered_columns(columns):
+    """The columns of a table that were produced by this module."""
+    return [c for c in columns if ENGINEERED.search(c) or c in TIME_FEATURES]
+
+
+def _groups(df, station_column):
+    if station_column in df.columns:
+        return df[station_column]
+    return pd.Series(0, index=df.index)
+
+
+def add_time_features(df, time_column=TIME_COLUMN):
+    t = df[time_column]
+    hour = t.dt.hour + t.dt.minute / 60
+    doy = t.dt.dayofyear
+    df["hour_sin"] = np.sin(2 * np.pi * hour / 24)
+    df["hour_cos"] = np.cos(2 * np.pi * hour / 24)
+    df["doy_sin"] = np.sin(2 * np.pi * doy / 365.25)
+    df["doy_cos"] = np.cos(2 * np.pi * doy / 365.25)
+    df["season"] = SEASON_OF_MONTH[t.dt.month.fillna(0).astype(int).values]
+    return df
+
+
+def add_lags(df, columns, lags, time_column=TIME_COLUMN, station_column=STATION_COLUMN):
+    """Exact-timestamp lags: one MultiIndex lookup per lag for all stations at once."""
+    groups = _groups(df, station_column)
+    lookup = df[list(columns)].set_index(pd.MultiIndex.from_arrays([groups, df[time_column]]))
+    lookup = lookup[~lookup.index.duplicated(keep="last")]
+    for k in lags:
+        earlier = pd.MultiIndex.from_arrays([groups, df[time_column] - pd.Timedelta(hours=k)])
+        lagged = lookup.reindex(earlier).to_numpy()
+        for j, col in enumerate(columns):
+            df[f"{col}_lag{k}h"] = lagged[:, j]
+    return df
+
+
+def add_rolling(df, columns, windows, time_column=TIME_COLUMN, station_column=STATION_COLUMN):
+    """Mean and std over the preceding w hours (current row excluded), per station."""
+    groups = _groups(df, station_column).rename("_group")
+    ordered = pd.concat([groups, df[[time_column] + list(columns)]], axis=1).sort_values(["_group", time_column])
+    for w in windows:
+        # Groups come out in 'ordered' order, so the results line up with ordered.index
+        rolled = (ordered.groupby("_group", sort=False, observed=True)
+                  .rolling(f"{w}h", on=time_column, closed="left")[list(columns)]
+                  .agg(["mean", "std"]))
+        for col in columns:
+            df.loc[ordered.index, f"{col}_mean{w}h"] = rolled[(col, "mean")].to_numpy()
+            df.loc[ordered.index, f"{col}_std{w}h"] = rolled[(col, "std")].to_numpy()
+    return df
+
+
+def build_features(df, columns=LAGGED_COLUMNS, lags=LAG_HOURS, windows=ROLLING_HOURS,
+                   time_column=TIME_COLUMN, station_column=STATION_COLUMN):
+    df = df.copy()
+    df[time_column] = pd.to_datetime(df[time_column], errors="coerce")
+    df = df[df[time_column].notna()].drop(columns=engineered_columns(df.columns))
+    with metrics.stage("time_features"):
+        add_time_features(df, time_column)
+    with metrics.stage("lags"):
+        add_lags(df, columns, lags, time_column, station_column)
+    with metrics.stage("rolling"):
+        add_rolling(df, columns, windows, time_column, station_column)
+    metrics.add("rows", len(df))
+    # The new columns come out as float64
+    return apply_schema(df, time_columns=(time_column,))
+
+
+def update_features(history, new_rows, columns=LAGGED_COLUMNS, lags=LAG_HOURS, windows=ROLLING_HOURS,
+                    time_column=TIME_COLUMN, station_column=STATION_COLUMN):
+    """
+    Appends 'new_rows' to an existing feature table. Only the new rows are computed,
+    using the trailing history (max lag / window) of their station as context.
+    Rows of 'history' with the same station and time are replaced.
+    """
+    history = history.copy()
+    new_rows = new_rows.copy()
+    history[time_column] = pd.to_datetime(history[time_column], errors="coerce")
+    new_rows[time_column] = pd.to_datetime(new_rows[time_column], errors="coerce")
+
+    history_keys = pd.MultiIndex.from_arrays([_groups(history, station_column), history[time_column]])
+    new_keys = pd.MultiIndex.from_arrays([_groups(new_rows, station_column), new_rows[time_column]])
+    history = history[~history_keys.isin(new_keys)]
+
+    # Earliest new timestamp of each station, minus the longest look-back
+    lookback = pd.Timedelta(hours=max(max(lags, default=0), max(windows, default=0)))
+    first_new = new_rows.groupby(_groups(new_rows, station_column), observed=True)[time_column].min() - lookback
+    cutoff = _groups(history, station_column).map(first_new)
+    context = history[history[time_column] >= cutoff]
+
+    raw = [c for c in history.columns if c not in engineered_columns(history.columns)]
+    combined = pd.concat([context[raw].assign(_new=False), new_rows.assign(_new=True)], ignore_index=True)
+    computed = build_features(combined, columns, lags, windows, time_column, station_column)
+    computed = computed[computed.pop("_new")]
+
+    updated = pd.concat([history, computed[history.columns.intersection(computed.columns)]], ignore_index=True)
+    return updated.sort_values([c for c in (station_column, time_column) if c in updated.columns])
+
+
+def write_table(df, path):
+    tmp_path = path + ".part"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adds per-station lag, rolling and diurnal features to the joined table")
+    parser.add_argument("--data", default="merged_final_no_none_final.csv", help="Joined table to build features for")
+    parser.add_argument("--output", default="features.csv", help="Feature table to write (or to update with --append)")
+    parser.add_argument("--append", default="", help="CSV of new rows to add to an existing --output incrementally")
+    parser.add_argument("--columns", nargs="+", default=list(LAGGED_COLUMNS), help="Columns to lag and roll")
+    parser.add_argument("--lags", nargs="+", type=int, default=list(LAG_HOURS), help="Lags in hours")
+    parser.add_argument("--windows", nargs="+", type=int, default=list(ROLLING_HOURS), help="Rolling windows in hours")
+    parser.add_argument("--time-column", default=TIME_COLUMN, help="Timestamp column")
+    parser.add_argument("--station-column", default=STATION_COLUMN,
+                        help="Station column (all rows are one station if it is missing)")
+    args = parser.parse_args()
+
+    options = dict(columns=args.columns, lags=args.lags, windows=args.windows,
+                   time_column=args.time_column, station_column=args.station_column)
+
+    with metrics.stage("load"):
+        source = args.append or args.data
+        df = read_table(source)
+        metrics.add("bytes_read", file_size(source))
+        metrics.gauge("frame_mb", memory_mb(df))
+
+    if args.append:
+        with metrics.stage("load"):
+            history = read_table(args.output)
+            metrics.add("bytes_read", file_size(args.output))
+            metrics.gauge("frame_mb", memory_mb(df) + memory_mb(history))
+        table = update_features(history, df, **options)
+    else:
+        table = build_features(df, **options)
+    metrics.gauge("frame_mb", memory_mb(table), stage="write")
+
+    with metrics.stage("write"):
+        write_table(table, args.output)
+        metrics.add("bytes_written", file_size(args.output))
+
+    if args.append:
+        print(f"✅ {len(df)} new rows added to {args.output} ({len(table)} rows)")
+    else:
+        print(f"✅ Features saved to {args.output} ({len(table)} rows, "
+              f"{len(engineered_columns(table.columns))} engineered columns)")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
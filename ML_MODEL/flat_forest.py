@@ -0,0 +1,238 @@
+"""
+Flattened tree ensembles for fast-loading, shared-memory prediction.
+
+A fitted forest (or gradient-boosted ensemble) is exported as one set of
+contiguous node arrays - feature, threshold, left/right child, value and the
+NaN direction - written as .npy files in a '<name>.forest' folder. Loading
+memory-maps the arrays, so a worker starts in milliseconds and all workers
+share one copy of the model through the page cache.
+
+Prediction walks all rows down a tree together, advancing an array of node
+indices one level per vectorized step. Trees are taken shallowest first, a few
+at a time when the batch is small, and each step stops at the depth of the
+deepest tree in play. Leaves point to themselves, so rows that reach a leaf
+early simply stay there; halfway down they are dropped from the walk.
+
+    python flat_forest.py models/pm25_model.joblib            # -> models/pm25_model.forest
+    python flat_forest.py models/pm25_model.joblib --check features.csv
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+FOREST_SUFFIX = ".forest"
+ARRAYS = ("feature", "threshold", "left", "right", "value", "missing_left", "roots", "children", "depths")
+# Added after the first exports; derived from the other arrays when missing
+DERIVED = ("children", "depths")
+
+BATCH_ROWS = 4096
+BLOCK_NODES = 8192  # (tree, row) pairs advanced per vectorized step
+COMPACT_DEPTH = 8  # trees at least this deep drop the rows that reached a leaf halfway down
+
+
+def is_flat_forest(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+def _random_forest_nodes(model):
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        yield (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+               tree.value[:, 0, 0], missing_left, tree.feature < 0)
+
+
+def _hist_gradient_boosting_nodes(model):
+    for (predictor,) in model._predictors:
+        nodes = predictor.nodes
+        if nodes["is_categorical"].any():
+            raise ValueError("Categorical splits cannot be flattened")
+        yield (nodes["feature_idx"], nodes["num_threshold"], nodes["left"], nodes["right"],
+               nodes["value"], nodes["missing_go_to_left"], nodes["is_leaf"].astype(bool))
+
+
+def flatten(model):
+    """Node arrays of all trees, concatenated, with child indices made global."""
+    kind = type(model).__name__
+    if kind in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        trees, combine, baseline = _random_forest_nodes(model), "mean", 0.0
+        # The trees see float32 inputs
+        input_dtype = "float32"
+    elif kind == "HistGradientBoostingRegressor":
+        trees, combine = _hist_gradient_boosting_nodes(model), "sum"
+        baseline = float(np.ravel(model._baseline_prediction)[0])
+        input_dtype = "float64"
+    else:
+        raise ValueError(f"Cannot flatten a {kind}")
+
+    parts = {name: [] for name in ARRAYS}
+    offset, max_depth = 0, 0
+    for feature, threshold, left, right, value, missing_left, is_leaf in trees:
+        n = len(feature)
+        own = np.arange(offset, offset + n, dtype=np.int32)
+        parts["feature"].append(np.where(is_leaf, 0, feature).astype(np.int32))
+        parts["threshold"].append(np.asarray(threshold, dtype=np.float64))
+        parts["left"].append(np.where(is_leaf, own, np.asarray(left, dtype=np.int64) + offset).astype(np.int32))
+        parts["right"].append(np.where(is_leaf, own, np.asarray(right, dtype=np.int64) + offset).astype(np.int32))
+        # Left and right child side by side: the child of node i is children[2 * i + went_right]
+        parts["children"].append(np.stack([parts["left"][-1], parts["right"][-1]], axis=1).ravel())
+        parts["value"].append(np.asarray(value, dtype=np.float64))
+        parts["missing_left"].append(np.asarray(missing_left, dtype=bool))
+        parts["roots"].append(np.array([offset], dtype=np.int32))
+        depth = _depth(np.asarray(left), np.asarray(right), is_leaf)
+        parts["depths"].append(np.array([depth], dtype=np.int32))
+        max_depth = max(max_depth, depth)
+        offset += n
+
+    arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+    meta = {"model_type": kind, "combine": combine, "baseline": baseline, "input_dtype": input_dtype,
+            "n_trees": len(arrays["roots"]), "n_nodes": offset, "max_depth": max_depth}
+    return arrays, meta
+
+
+def _depth(left, right, is_leaf):
+    depth, frontier = 0, np.array([0])
+    while True:
+        frontier = frontier[~is_leaf[frontier]]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+def export_forest(model, features, path, **info):
+    """Writes the flattened model to the 'path' folder (replacing an older export)."""
+    arrays, meta = flatten(model)
+    meta.update(features=list(features), **info)
+
+    tmp_path = path + ".part"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.isdir(path):
+        import shutil
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return meta
+
+
+class FlatForest:
+    """Minimal predictor over the exported node arrays (memory-mapped by default)."""
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        mode = "r" if mmap else None
+        for name in ARRAYS:
+            array_path = os.path.join(path, f"{name}.npy")
+            if name in DERIVED and not os.path.exists(array_path):
+                setattr(self, name, None)
+                continue
+            # Plain ndarray views of the maps: indexing np.memmap itself goes through the subclass on every call
+            setattr(self, name, np.asarray(np.load(array_path, mmap_mode=mode)))
+        if self.children is None:
+            self.children = np.stack([self.left, self.right], axis=1).ravel()
+        if self.depths is None:
+            self.depths = np.full(len(self.roots), self.meta["max_depth"], dtype=np.int32)
+        self.tree_order = np.argsort(self.depths, kind="stable")
+        self.features = self.meta["features"]
+        self.input_dtype = np.dtype(self.meta["input_dtype"])
+
+    def predict(self, X, batch_size=BATCH_ROWS):
+        X = np.asarray(X, dtype=self.input_dtype).astype(np.float64)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            out[start:start + batch_size] = self._predict_batch(X[start:start + batch_size])
+        return out
+
+    def _predict_batch(self, X):
+        n, n_features = X.shape
+        flat = X.ravel()
+        has_nan = bool(np.isnan(flat).any())
+        per_block = max(1, BLOCK_NODES // max(n, 1))
+        row_offsets = np.tile(np.arange(n, dtype=np.intp) * n_features, per_block)
+
+        total = np.zeros(n, dtype=np.float64)
+        for start in range(0, len(self.tree_order), per_block):
+            trees = self.tree_order[start:start + per_block]
+            node = np.repeat(self.roots[trees], n)
+            offsets = row_offsets[:len(node)]
+            depth = int(self.depths[trees].max())
+            reached, walking = None, None
+            for step in range(depth):
+                if step == depth // 2 and depth >= COMPACT_DEPTH:
+                    reached = node
+                    walking = np.flatnonzero(self.children.take(node << 1) != node)
+                    node, offsets = node[walking], offsets[walking]
+                x = flat.take(self.feature.take(node) + offsets)
+                go_right = x > self.threshold.take(node)
+                if has_nan:
+                    go_right = np.where(np.isnan(x), ~self.missing_left.take(node), go_right)
+                node = self.children.take((node << 1) + go_right)
+            if reached is not None:
+                reached[walking] = node
+                node = reached
+            total += self.value.take(node).reshape(len(trees), n).sum(axis=0)
+
+        if self.meta["combine"] == "mean":
+            return total / len(self.roots)
+        return self.meta["baseline"] + total
+
+
+def load_flat_forest(path, mmap=True):
+    """Returns (model, features) like model_store.load_model()."""
+    forest = FlatForest(path, mmap=mmap)
+    return forest, forest.features
+
+
+def default_export_path(model_path):
+    return os.path.splitext(model_path)[0] + FOREST_SUFFIX
+
+
+def main():
+    from model_store import DEFAULT_MODEL_PATH, load_model
+
+    parser = argparse.ArgumentParser(description="Exports a saved model as memory-mappable flat node arrays")
+    parser.add_argument("model", nargs="?", default=DEFAULT_MODEL_PATH, help="Saved model (.joblib) to export")
+    parser.add_argument("--output", default="", help="Export folder (default: <model>.forest)")
+    parser.add_argument("--check", default="", metavar="CSV",
+                        help="Compare predictions and timings against the original model on this feature table")
+    args = parser.parse_args()
+
+    output = args.output or default_export_path(args.model)
+    model, features = load_model(args.model)
+    meta = export_forest(model, features, output, source=os.path.abspath(args.model))
+    print(f"✅ Exported {meta['n_trees']} trees ({meta['n_nodes']:,} nodes, depth {meta['max_depth']}) to {output}")
+
+    if args.check:
+        import pandas as pd
+
+        X = pd.read_csv(args.check)[features].apply(pd.to_numeric, errors="coerce").dropna().to_numpy()
+
+        t0 = time.perf_counter()
+        forest, _ = load_flat_forest(output)
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        expected = model.predict(X)
+        sklearn_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = forest.predict(X)
+        flat_s = time.perf_counter() - t0
+
+        print(f"Loaded in {load_s * 1000:.1f} ms; {len(X):,} rows: scikit-learn {sklearn_s:.3f}s, flat {flat_s:.3f}s; "
+              f"max |difference| {np.abs(expected - got).max():.2e}")
+        if not np.allclose(expected, got, rtol=1e-6, atol=1e-6):
+            print("[ERROR] Flat predictions differ from the original model")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
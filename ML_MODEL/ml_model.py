@@ -1,44 +1,189 @@
+import os
+import sys
+import json
+import time
+import argparse
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 
-# Load the data
-df = pd.read_csv('merged_final_no_none_final.csv')
+from model_store import DEFAULT_MODEL_PATH, save_model, load_model, load_metadata
+from engines import ENGINES, DEFAULT_ENGINE, build_engine, engine_name, n_trees, grow, model_size
+from features import engineered_columns
 
-# Drop the 'Date' column and set up features/target
-X = df[['WS', 'RH', 'AT', 'blh',
-        'WV_RADIANCE', 'MIR_RADIANCE', 'VIS_ALBEDO', 'TIR1_TEMP']]
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION"))
+from pipeline_metrics import StageMetrics, file_size
+from schema import read_table, memory_mb
 
+FEATURES = ['WS', 'RH', 'AT', 'blh',
+            'WV_RADIANCE', 'MIR_RADIANCE', 'VIS_ALBEDO', 'TIR1_TEMP']
+TARGET = 'PM2.5'
 
-y = df['PM2.5']
+metrics = StageMetrics("ml_model")
 
-# Split into train and test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Train Random Forest
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+def load_training_data(path, features=FEATURES):
+    with metrics.stage("load"):
+        # Only the model's columns, as float32
+        df = read_table(path, columns=list(features) + [TARGET])
+        metrics.add("rows", len(df))
+        metrics.add("bytes_read", file_size(path))
+        metrics.gauge("frame_mb", memory_mb(df))
 
-# Predict and evaluate
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
+    # Lags/rolling stats are missing at the start of each station's series
+    df = df.dropna(subset=list(features) + [TARGET])
 
-print(f"Mean Squared Error: {mse:.2f}")
-print(f"R2 Score: {r2:.2f}")
+    # Drop the 'Date' column and set up features/target
+    return df[features], df[TARGET]
 
-# Optional: Feature importances
-import matplotlib.pyplot as plt
-import numpy as np
 
-feature_importances = model.feature_importances_
-features = X.columns
-indices = np.argsort(feature_importances)[::-1]
+def build_model(n_estimators=100, n_jobs=-1, engine=DEFAULT_ENGINE):
+    return build_engine(engine, n_estimators, n_jobs)
 
-plt.figure(figsize=(10,6))
-plt.title("Feature Importances")
-plt.bar(range(len(features)), feature_importances[indices], align="center")
-plt.xticks(range(len(features)), features[indices], rotation=90)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+
+def grow_model(model, extra_trees, n_jobs=-1):
+    return grow(model, extra_trees, n_jobs)
+
+
+def evaluate(model, X_test, y_test):
+    with metrics.stage("predict"):
+        y_pred = model.predict(X_test)
+        metrics.add("rows", len(X_test))
+    return mean_squared_error(y_test, y_pred), r2_score(y_test, y_pred)
+
+
+def compare_engines(engines, X_train, X_test, y_train, y_test, n_estimators, n_jobs):
+    """Fits every engine on the same split and measures what it costs."""
+    report = []
+    for name in engines:
+        model = build_model(n_estimators, n_jobs, engine=name)
+
+        t0 = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_s = time.perf_counter() - t0
+
+        report.append({
+            "engine": name,
+            "fit_s": round(fit_s, 3),
+            "predict_rows_per_s": round(len(X_test) / predict_s) if predict_s else None,
+            "model_mb": round(model_size(model) / 2**20, 2),
+            "mse": mean_squared_error(y_test, y_pred),
+            "r2": r2_score(y_test, y_pred),
+        })
+    return report
+
+
+def print_report(report):
+    print(f"{'engine':<8} {'fit (s)':>9} {'predict rows/s':>15} {'size (MB)':>10} {'MSE':>10} {'R2':>6}")
+    for r in report:
+        print(f"{r['engine']:<8} {r['fit_s']:>9.2f} {r['predict_rows_per_s'] or 0:>15,} {r['model_mb']:>10.2f} "
+              f"{r['mse']:>10.2f} {r['r2']:>6.2f}")
+
+
+def plot_feature_importances(model, features):
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    if not hasattr(model, "feature_importances_"):
+        print(f"No feature importances for the '{engine_name(model)}' engine. Skipping the plot..")
+        return
+
+    feature_importances = model.feature_importances_
+    features = pd.Index(features)
+    indices = np.argsort(feature_importances)[::-1]
+
+    plt.figure(figsize=(10,6))
+    plt.title("Feature Importances")
+    plt.bar(range(len(features)), feature_importances[indices], align="center")
+    plt.xticks(range(len(features)), features[indices], rotation=90)
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trains the PM2.5 model and saves it for predict.py")
+    parser.add_argument("--data", default="merged_final_no_none_final.csv", help="Joined training table")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Where the fitted model is saved")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                        help="rf = Random Forest, hgb = histogram gradient boosting")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees (or boosting iterations) for a fresh model")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Cores used for fitting (-1 = all)")
+    parser.add_argument("--grow", type=int, default=0, metavar="N",
+                        help="Load the saved model and add N trees fitted on --data instead of retraining")
+    parser.add_argument("--no-plot", action="store_true", help="Skip the feature importance plot")
+    parser.add_argument("--compare", nargs="+", choices=sorted(ENGINES), metavar="ENGINE",
+                        help="Fit each engine on the same split and report fit time, predict throughput, size and MSE/R2 "
+                             "(nothing is saved)")
+    parser.add_argument("--report", default="engine_report.json", help="Where --compare writes its report")
+    parser.add_argument("--engineered", action="store_true",
+                        help="Also train on the lag/rolling/diurnal columns added by features.py")
+    args = parser.parse_args()
+
+    if args.grow:
+        model, features = load_model(args.model)
+        previous = load_metadata(args.model)
+        print(f"Loaded {engine_name(model)} model with {n_trees(model)} trees, adding {args.grow} more..")
+        model = grow_model(model, args.grow, n_jobs=args.n_jobs)
+    else:
+        features = FEATURES
+        if args.engineered:
+            features = FEATURES + engineered_columns(pd.read_csv(args.data, nrows=0).columns)
+        previous = {}
+        model = build_model(args.n_estimators, args.n_jobs, engine=args.engine)
+
+    X, y = load_training_data(args.data, features)
+
+    # Split into train and test sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    if args.compare:
+        with metrics.stage("compare"):
+            report = compare_engines(args.compare, X_train, X_test, y_train, y_test, args.n_estimators, args.n_jobs)
+        print_report(report)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"data": os.path.abspath(args.data), "train_rows": len(X_train), "test_rows": len(X_test),
+                       "n_estimators": args.n_estimators, "engines": report}, f, indent=2)
+        print(f"✅ Report saved to {args.report}")
+        if metrics.enabled:
+            metrics.write()
+            print(metrics.summary())
+        return
+
+    # Train the model
+    with metrics.stage("train"):
+        model.fit(X_train, y_train)
+        metrics.add("rows", len(X_train))
+
+    # Predict and evaluate
+    mse, r2 = evaluate(model, X_test, y_test)
+
+    print(f"Mean Squared Error: {mse:.2f}")
+    print(f"R2 Score: {r2:.2f}")
+
+    # warm_start is only needed while growing, keep the saved model plain
+    model.set_params(warm_start=False)
+    save_model(model, features, args.model,
+               target=TARGET,
+               engine=engine_name(model),
+               n_estimators=n_trees(model),
+               training_files=previous.get("training_files", []) + [os.path.abspath(args.data)],
+               training_rows=previous.get("training_rows", 0) + len(X_train),
+               mse=mse, r2=r2)
+    print(f"✅ Model saved to {args.model}")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+    # Optional: Feature importances
+    if not args.no_plot:
+        plot_feature_importances(model, features)
+
+
+if __name__ == "__main__":
+    main()
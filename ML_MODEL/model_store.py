@@ -0,0 +1,56 @@
+import os
+import json
+from datetime import datetime
+
+import joblib
+
+from flat_forest import is_flat_forest, load_flat_forest
+
+DEFAULT_MODEL_PATH = os.path.join("models", "pm25_model.joblib")
+
+
+def metadata_path(model_path):
+    """Sidecar JSON written next to the model (features, training info)."""
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def save_model(model, features, path=DEFAULT_MODEL_PATH, **info):
+    """Saves the fitted model together with the feature columns it was trained on."""
+    model_dir = os.path.dirname(path)
+    if model_dir:
+        os.makedirs(model_dir, exist_ok=True)
+
+    joblib.dump({"model": model, "features": list(features)}, path)
+
+    meta = {
+        "features": list(features),
+        "model_type": type(model).__name__,
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    meta.update(info)
+    with open(metadata_path(path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_model(path=DEFAULT_MODEL_PATH, mmap=None):
+    """
+    Returns (model, features). With mmap=True the large tree arrays are memory-mapped,
+    so several worker processes share one copy of the model in RAM.
+    A '.forest' folder written by flat_forest.py loads as a FlatForest predictor,
+    memory-mapped unless mmap=False; a pickled model only with mmap=True.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No saved model at '{path}'. Train one first with ml_model.py")
+    if is_flat_forest(path):
+        return load_flat_forest(path, mmap=mmap is not False)
+    bundle = joblib.load(path, mmap_mode="r" if mmap else None)
+    return bundle["model"], bundle["features"]
+
+
+def load_metadata(path=DEFAULT_MODEL_PATH):
+    meta_path = metadata_path(path)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
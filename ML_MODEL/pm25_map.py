@@ -0,0 +1,254 @@
+"""
+Gridded PM2.5 maps from INSAT-3D granules.
+
+For every pixel of a lat/lon window (Kerala by default) the model features are
+built from the calibrated satellite bands of the granule plus ERA5 fields
+interpolated to the scan time and to the pixel centre:
+
+    blh -> blh,  WS -> |(u10, v10)|,  AT -> t2m in degC,  RH -> from t2m and d2m
+
+The window is split into blocks of rows that worker processes read, calibrate
+and predict independently, so memory per block is bounded by --chunk-rows.
+One compressed NetCDF is written per hour (granules in the same hour are averaged).
+
+    python pm25_map.py ../DATA-COLLECTION/SATELLITE-DATA/unprocessed-data/new_jan/*.h5 --era5 data.nc
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_store import DEFAULT_MODEL_PATH, load_model
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "..", "DATA-COLLECTION"))
+sys.path.append(os.path.join(HERE, "..", "DATA-COLLECTION", "SATELLITE-DATA"))
+from pipeline_metrics import StageMetrics, file_size
+from metrics_server import start_metrics_server, add_metrics_argument
+from era5 import open_era5, era5_time_name, time_weights, next_step
+from insat3d import (SATELLITE_COLUMNS, KERALA_BBOX, bbox_to_window, granule_time,
+                     pixel_latitudes, pixel_longitudes, read_calibrated)
+
+metrics = StageMetrics("pm25_map")
+
+# Model features derived from ERA5 and the variables they need
+ERA5_FEATURES = {
+    "blh": ("blh",),
+    "WS": ("u10", "v10"),
+    "AT": ("t2m",),
+    "RH": ("t2m", "d2m"),
+}
+
+
+# ---------------------------------------------------------------- ERA5 ----
+
+def era5_snapshot(path, ts, variables):
+    """ERA5 fields linearly interpolated in time to 'ts' -> (lats, lons, {var: 2D array})."""
+    with open_era5(path) as ds:
+        tname = era5_time_name(ds)
+        times = ds[tname].values
+        i0, w = time_weights(times, [np.datetime64(ts)])
+        i0, w = int(i0[0]), float(w[0])
+        if np.isnan(w):
+            raise ValueError(f"{ts} is outside the ERA5 file's time range ({times[0]} to {times[-1]})")
+
+        fields = {}
+        for var in variables:
+            da = ds[var]
+            v0 = da.isel({tname: i0}).values.astype(np.float32)
+            v1 = da.isel({tname: int(next_step(i0, len(times)))}).values.astype(np.float32)
+            fields[var] = (1 - w) * v0 + w * v1
+        return ds["latitude"].values, ds["longitude"].values, fields
+
+
+def bilinear(grid, grid_lats, grid_lons, lats, lons):
+    """Bilinear interpolation of a regular lat/lon grid onto the separable pixel grid lats x lons."""
+    if grid_lats[0] > grid_lats[-1]:  # ERA5 latitudes run north -> south
+        grid_lats, grid = grid_lats[::-1], grid[::-1]
+
+    fi = np.interp(lats, grid_lats, np.arange(len(grid_lats)))
+    fj = np.interp(lons, grid_lons, np.arange(len(grid_lons)))
+    i0 = np.clip(np.floor(fi).astype(int), 0, len(grid_lats) - 2)
+    j0 = np.clip(np.floor(fj).astype(int), 0, len(grid_lons) - 2)
+    wi = (fi - i0)[:, None].astype(np.float32)
+    wj = (fj - j0)[None, :].astype(np.float32)
+    i0, j0 = i0[:, None], j0[None, :]
+
+    return (grid[i0, j0] * (1 - wi) * (1 - wj) + grid[i0 + 1, j0] * wi * (1 - wj)
+            + grid[i0, j0 + 1] * (1 - wi) * wj + grid[i0 + 1, j0 + 1] * wi * wj)
+
+
+def era5_features(fields, feature):
+    """Converts interpolated ERA5 fields to the units of the CPCB columns the model was trained on."""
+    if feature == "blh":
+        return fields["blh"]
+    if feature == "WS":
+        return np.hypot(fields["u10"], fields["v10"])
+    if feature == "AT":
+        return fields["t2m"] - 273.15
+    if feature == "RH":
+        # Magnus formula
+        t = fields["t2m"] - 273.15
+        td = fields["d2m"] - 273.15
+        return np.clip(100 * np.exp(17.625 * td / (243.04 + td) - 17.625 * t / (243.04 + t)), 0, 100)
+    raise KeyError(feature)
+
+
+# ------------------------------------------------------------- workers ----
+
+_worker = {}
+
+
+def _init_worker(model_path, features):
+    # Memory-mapped, so the forest's arrays are shared between workers
+    model, _ = load_model(model_path, mmap=True)
+    _worker.update(model=model, features=features)
+
+
+def _predict_block(granule, window, era5):
+    import h5py
+
+    row0, row1, col0, col1 = window
+    features = _worker["features"]
+    grid_lats, grid_lons, fields = era5
+
+    lats = pixel_latitudes(np.arange(row0, row1))
+    lons = pixel_longitudes(np.arange(col0, col1))
+    shape = (row1 - row0, col1 - col0)
+
+    interp = {var: bilinear(values, grid_lats, grid_lons, lats, lons) for var, values in fields.items()}
+
+    columns = []
+    with h5py.File(granule, "r") as f:
+        for feature in features:
+            if feature in SATELLITE_COLUMNS:
+                columns.append(read_calibrated(f, feature, window))
+            else:
+                columns.append(era5_features(interp, feature))
+
+    X = np.stack([np.broadcast_to(c, shape).ravel() for c in columns], axis=1).astype(np.float32)
+    valid = np.isfinite(X).all(axis=1)
+
+    pm25 = np.full(X.shape[0], np.nan, dtype=np.float32)
+    if valid.any():
+        pm25[valid] = _worker["model"].predict(X[valid])
+    return row0, pm25.reshape(shape)
+
+
+# ---------------------------------------------------------------- main ----
+
+def check_features(features):
+    unknown = [f for f in features if f not in SATELLITE_COLUMNS and f not in ERA5_FEATURES]
+    if unknown:
+        raise ValueError(f"Model features {unknown} cannot be built from a granule and ERA5")
+
+
+def predict_granule(granule, window, era5, pool, chunk_rows):
+    row0, row1, col0, col1 = window
+    blocks = [(r, min(r + chunk_rows, row1), col0, col1) for r in range(row0, row1, chunk_rows)]
+    pm25 = np.full((row1 - row0, col1 - col0), np.nan, dtype=np.float32)
+    results = pool.map(_predict_block, [granule] * len(blocks), blocks, [era5] * len(blocks))
+    for block_row0, block in results:
+        pm25[block_row0 - row0:block_row0 - row0 + block.shape[0]] = block
+    return pm25
+
+
+def write_map(path, hour, pm25, window, n_granules):
+    import xarray as xr
+
+    row0, row1, col0, col1 = window
+    ds = xr.Dataset(
+        {"pm25": (("latitude", "longitude"), pm25, {"units": "ug m-3", "long_name": "Estimated PM2.5"})},
+        coords={
+            "latitude": pixel_latitudes(np.arange(row0, row1)),
+            "longitude": pixel_longitudes(np.arange(col0, col1)),
+            "time": np.datetime64(hour),
+        },
+        attrs={"source": "INSAT-3D 3RIMG L1C + ERA5", "granules_averaged": n_granules},
+    )
+    tmp_path = path + ".part"
+    ds.to_netcdf(tmp_path, encoding={"pm25": {"zlib": True, "complevel": 4, "least_significant_digit": 1}})
+    os.replace(tmp_path, path)
+
+
+def group_by_hour(granules):
+    hours = {}
+    for path in granules:
+        ts = granule_time(os.path.basename(path))
+        if ts is None:
+            print(f"[WARNING] No timestamp in '{path}'. Skipping..")
+            continue
+        hours.setdefault(ts.replace(minute=0), []).append((ts, path))
+    return dict(sorted(hours.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes hourly gridded PM2.5 maps from INSAT-3D granules and ERA5")
+    parser.add_argument("granules", nargs="+", help="Granule files or glob patterns")
+    parser.add_argument("--era5", required=True, help="ERA5 NetCDF with blh, t2m, d2m, u10, v10")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Saved model to load")
+    parser.add_argument("--bbox", nargs=4, type=float, default=KERALA_BBOX,
+                        metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"), help="Area to map (default: Kerala)")
+    parser.add_argument("--chunk-rows", type=int, default=64, help="Pixel rows per worker block (bounds memory)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output-dir", default="pm25_maps", help="Where the hourly NetCDF maps are written")
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+    start_metrics_server(metrics, args.metrics_port)
+
+    granules = sorted({p for pattern in args.granules for p in glob.glob(pattern)})
+    _, features = load_model(args.model)
+    check_features(features)
+    era5_vars = sorted({v for f in features if f in ERA5_FEATURES for v in ERA5_FEATURES[f]})
+    window = bbox_to_window(args.bbox)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"Mapping {len(granules)} granules over rows {window[0]}-{window[1]}, cols {window[2]}-{window[3]} "
+          f"({(window[1] - window[0]) * (window[3] - window[2]):,} pixels) with {args.workers} workers")
+
+    shape = (window[1] - window[0], window[3] - window[2])
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.model, features)) as pool:
+        remaining = len(granules)
+        for hour, scans in group_by_hour(granules).items():
+            t0 = time.perf_counter()
+            total = np.zeros(shape, dtype=np.float32)
+            n_valid = np.zeros(shape, dtype=np.int32)
+
+            with metrics.stage("predict"):
+                for ts, granule in scans:
+                    metrics.gauge("queue_depth", remaining)
+                    granule_start = time.perf_counter()
+                    era5 = era5_snapshot(args.era5, ts, era5_vars)
+                    pm25 = predict_granule(granule, window, era5, pool, args.chunk_rows)
+                    metrics.observe("granule", time.perf_counter() - granule_start)
+                    remaining -= 1
+
+                    valid = np.isfinite(pm25)
+                    total[valid] += pm25[valid]
+                    n_valid += valid
+                    metrics.add("granules")
+                    metrics.add("rows", pm25.size)
+
+            with metrics.stage("write"):
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    hourly = np.where(n_valid > 0, total / n_valid, np.nan).astype(np.float32)
+                out_path = os.path.join(args.output_dir, f"pm25_{hour:%Y%m%d_%H%M}.nc")
+                write_map(out_path, hour, hourly, window, len(scans))
+                metrics.add("bytes_written", file_size(out_path))
+
+            print(f"[{hour:%d-%m-%Y %H:%M}] {len(scans)} granule(s) mapped in {time.perf_counter() - t0:.1f}s -> {out_path}")
+        metrics.gauge("queue_depth", 0)
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+from model_store import DEFAULT_MODEL_PATH, load_model
+
+# Shared pipeline helpers live in DATA-COLLECTION/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION"))
+from pipeline_metrics import StageMetrics, file_size
+from metrics_server import start_metrics_server, add_metrics_argument
+
+metrics = StageMetrics("inference")
+
+# Files a producer is still writing (written under a temporary name, then renamed)
+PARTIAL_SUFFIXES = (".part", ".tmp")
+
+
+def predict_frame(model, features, df):
+    """Adds a 'PM2.5_pred' column; rows with missing features get NaN instead of failing."""
+    X = df[features].apply(pd.to_numeric, errors="coerce")
+    complete = X.notna().all(axis=1)
+
+    out = df.copy()
+    out["PM2.5_pred"] = float("nan")
+    if complete.any():
+        out.loc[complete, "PM2.5_pred"] = model.predict(X[complete])
+    return out
+
+
+def latest_rows(df, id_column, time_column):
+    """Keeps the most recent row of every station / grid cell."""
+    times = pd.to_datetime(df[time_column], errors="coerce", dayfirst=True)
+    # Unparseable times sort first, so they only win for a station without any valid one
+    order = times.sort_values(kind="stable", na_position="first").index
+    return df.loc[order].groupby(id_column, sort=False).tail(1).sort_index()
+
+
+def check_columns(df, features, path):
+    missing = [c for c in features if c not in df.columns]
+    if missing:
+        raise ValueError(f"'{path}' is missing feature columns: {missing}")
+
+
+def predict_file(model, features, path, output, batch_size=100000, id_column=None, time_column=None):
+    """
+    Predicts one feature file in vectorized batches of 'batch_size' rows.
+    With id_column/time_column only the latest row per station or grid cell is predicted.
+    Returns the number of rows written.
+    """
+    tmp_output = output + ".part"
+    rows = 0
+
+    with metrics.stage("predict"):
+        if id_column:
+            df = pd.read_csv(path)
+            check_columns(df, features, path)
+            chunks = [latest_rows(df, id_column, time_column)]
+        else:
+            chunks = pd.read_csv(path, chunksize=batch_size)
+
+        header = True
+        for chunk in chunks:
+            check_columns(chunk, features, path)
+            result = predict_frame(model, features, chunk)
+            result.to_csv(tmp_output, mode="w" if header else "a", header=header, index=False)
+            header = False
+            rows += len(result)
+
+        # Readers never see a half-written prediction file
+        os.replace(tmp_output, output)
+        metrics.add("rows", rows)
+        metrics.add("bytes_read", file_size(path))
+        metrics.add("bytes_written", file_size(output))
+    return rows
+
+
+def output_path_for(path, output_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, f"{stem}_pm25.csv")
+
+
+def is_pending(path, output):
+    """A feature file needs predicting if it has no output yet or changed since."""
+    return not os.path.exists(output) or os.path.getmtime(output) < os.path.getmtime(path)
+
+
+def pending_files(folder, output_dir):
+    """(name, path, output) of the finished feature CSVs in 'folder' that still need predicting."""
+    pending = []
+    for fname in sorted(os.listdir(folder)):
+        if not fname.endswith(".csv") or fname.endswith(PARTIAL_SUFFIXES):
+            continue
+        path = os.path.join(folder, fname)
+        output = output_path_for(path, output_dir)
+        if is_pending(path, output):
+            pending.append((fname, path, output))
+    return pending
+
+
+def watch(folder, model_path, output_dir, interval, **predict_kwargs):
+    """Polls 'folder' for new or updated feature CSVs, keeping the model loaded between files."""
+    os.makedirs(output_dir, exist_ok=True)
+    model, features = load_model(model_path)
+    model_mtime = os.path.getmtime(model_path)
+    print(f"Watching '{folder}' every {interval}s for new feature files. Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            # Picks up a retrained model without restarting the service
+            if os.path.getmtime(model_path) != model_mtime:
+                model, features = load_model(model_path)
+                model_mtime = os.path.getmtime(model_path)
+                print(f"[INFO] Reloaded model from {model_path}")
+
+            pending = pending_files(folder, output_dir)
+            for done, (fname, path, output) in enumerate(pending):
+                metrics.gauge("queue_depth", len(pending) - done)
+                t0 = time.perf_counter()
+                try:
+                    rows = predict_file(model, features, path, output, **predict_kwargs)
+                except (ValueError, OSError, pd.errors.ParserError) as e:
+                    print(f"[ERROR] Could not predict '{fname}': {e}")
+                    metrics.add("errors")
+                    continue
+                print(f"[{time.strftime('%H:%M:%S')}] {fname}: {rows:,} rows predicted in {time.perf_counter() - t0:.2f}s -> {output}")
+            metrics.gauge("queue_depth", 0)
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nPrediction Service Stopped By User. Exiting..")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predicts PM2.5 with the model saved by ml_model.py (no retraining)")
+    parser.add_argument("input", help="CSV with the model's feature columns, or a folder of them with --watch")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Saved model to load")
+    parser.add_argument("--output", default="predictions.csv", help="Where predictions are written (single file mode)")
+    parser.add_argument("--batch-size", type=int, default=100000, help="Rows predicted per vectorized batch")
+    parser.add_argument("--latest-by", default="", metavar="ID_COLUMN",
+                        help="Only predict the latest row per value of this column (e.g. Station)")
+    parser.add_argument("--time-column", default="From Date", help="Timestamp column used with --latest-by")
+    parser.add_argument("--watch", action="store_true", help="Keep running and predict new files appearing in 'input'")
+    parser.add_argument("--output-dir", default="predictions", help="Where predictions are written in --watch mode")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between folder polls in --watch mode")
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+    start_metrics_server(metrics, args.metrics_port)
+
+    predict_kwargs = {"batch_size": args.batch_size,
+                      "id_column": args.latest_by or None,
+                      "time_column": args.time_column}
+
+    if args.watch:
+        watch(args.input, args.model, args.output_dir, args.interval, **predict_kwargs)
+    else:
+        t0 = time.perf_counter()
+        with metrics.stage("load_model"):
+            model, features = load_model(args.model)
+        load_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        try:
+            rows = predict_file(model, features, args.input, args.output, **predict_kwargs)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        predict_time = time.perf_counter() - t0
+
+        print(f"Model loaded in {load_time:.2f}s, {rows:,} rows predicted in {predict_time:.2f}s")
+        print(f"✅ Predictions saved to {args.output}")
+
+    if metrics.enabled:
+        metrics.write()
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
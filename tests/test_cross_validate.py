@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML_MODEL"))
+
+from cross_validate import make_folds
+
+
+def hourly(n=100):
+    return pd.DataFrame({"From Date": pd.date_range("2024-01-01", periods=n, freq="h"), "Station": "Eloor"})
+
+
+@pytest.mark.parametrize("scheme", ["blocked", "rolling"])
+def test_every_fold_has_train_and_test_rows(scheme):
+    folds = make_folds(hourly(), scheme, 5, 6)
+    assert folds
+    assert all(len(train) and len(test) for train, test in folds)
+
+
+def test_folds_without_training_rows_are_skipped():
+    # 100 h in 2 blocks: a 60 h gap leaves no training rows for either block
+    with pytest.raises(ValueError, match="smaller --gap"):
+        make_folds(hourly(), "blocked", 2, 60)
+    # 4 blocks of 25 h: only the first and last keep rows outside a 60 h gap
+    assert len(make_folds(hourly(), "blocked", 4, 60)) == 2
+
+
+def test_unparseable_times_are_rejected():
+    df = hourly()
+    df.loc[50, "From Date"] = pd.NaT
+    with pytest.raises(ValueError, match="unparseable"):
+        make_folds(df, "blocked", 5, 6)
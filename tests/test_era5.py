@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION"))
+
+from era5 import time_weights, next_step
+
+
+def hours(*values):
+    return np.array([f"2024-01-01T{h:02d}:00" for h in values], dtype="datetime64[ns]")
+
+
+def test_time_weights_between_steps():
+    i0, w = time_weights(hours(0, 1, 2), np.array(["2024-01-01T01:15", "2024-01-01T03:00"], dtype="datetime64[ns]"))
+    assert i0[0] == 1 and w[0] == pytest.approx(0.25)
+    assert np.isnan(w[1])
+
+
+def test_time_weights_single_step():
+    times = hours(6)
+    i0, w = time_weights(times, np.concatenate([hours(6), hours(7)]))
+    assert list(i0) == [0, 0]
+    assert w[0] == 0.0 and np.isnan(w[1])
+
+    values = np.array([[3.0]], dtype=np.float32)
+    i1 = next_step(i0, len(times))
+    assert (1 - w[0]) * values[i0[0], 0] + w[0] * values[i1[0], 0] == 3.0
+
+
+def test_time_weights_empty_file():
+    with pytest.raises(ValueError):
+        time_weights(hours(), hours(6))
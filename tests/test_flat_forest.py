@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML_MODEL"))
+
+from flat_forest import DERIVED, FlatForest, export_forest
+
+sklearn_ensemble = pytest.importorskip("sklearn.ensemble")
+
+
+def training_data(seed=0, n=600):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    y = 30 + 10 * X[:, 0] - 5 * X[:, 1] ** 2 + np.where(X[:, 2] > 0, 8, -3) + rng.normal(0, 1, n)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.fixture(params=["hgb", "rf"])
+def model(request):
+    X, y = training_data()
+    if request.param == "hgb":
+        model = sklearn_ensemble.HistGradientBoostingRegressor(max_iter=40, random_state=0)
+    else:
+        X = np.nan_to_num(X)
+        model = sklearn_ensemble.RandomForestRegressor(n_estimators=12, random_state=0)
+    return model.fit(X, y), X
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 4096])
+def test_flat_predictions_match_the_model(model, batch_size, tmp_path):
+    model, X = model
+    export_forest(model, [f"f{i}" for i in range(X.shape[1])], str(tmp_path / "m.forest"))
+    forest = FlatForest(str(tmp_path / "m.forest"))
+
+    np.testing.assert_allclose(forest.predict(X, batch_size=batch_size), model.predict(X), rtol=1e-9, atol=1e-9)
+
+
+def test_exports_without_derived_arrays_still_load(model, tmp_path):
+    model, X = model
+    path = str(tmp_path / "m.forest")
+    export_forest(model, [f"f{i}" for i in range(X.shape[1])], path)
+    for name in DERIVED:
+        os.remove(os.path.join(path, f"{name}.npy"))
+
+    np.testing.assert_allclose(FlatForest(path).predict(X), model.predict(X), rtol=1e-9, atol=1e-9)
+
+
+def test_load_model_memory_maps_flat_exports_by_default(model, tmp_path):
+    from model_store import load_model
+
+    model, X = model
+    path = str(tmp_path / "m.forest")
+    export_forest(model, [f"f{i}" for i in range(X.shape[1])], path)
+
+    forest, _ = load_model(path)
+    assert isinstance(forest.value.base, np.memmap)
+    in_ram, _ = load_model(path, mmap=False)
+    assert not isinstance(in_ram.value.base, np.memmap)
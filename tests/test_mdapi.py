@@ -0,0 +1,163 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+MOSDAC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION", "SATELLITE-DATA",
+                          "mosdac-api")
+
+TOKENS = {"access_token": "access", "refresh_token": "refresh"}
+
+
+@pytest.fixture
+def mdapi(monkeypatch, tmp_path):
+    # mdapi.py reads 'config.json' from the working directory when it is imported
+    monkeypatch.chdir(MOSDAC_DIR)
+    monkeypatch.syspath_prepend(MOSDAC_DIR)
+    module = importlib.import_module("mdapi")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(module, "logout", lambda: None)
+    monkeypatch.setattr(module, "start_metrics_server", lambda *args: None)
+    return module
+
+
+def run_main(monkeypatch, module, *flags):
+    monkeypatch.setattr(sys, "argv", ["mdapi.py", *flags])
+    module.main()
+
+
+def test_daemon_logs_in_and_runs(mdapi, monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(mdapi, "get_token", lambda: (dict(TOKENS), "someone"))
+    monkeypatch.setattr(mdapi, "run_daemon", calls.append)
+
+    run_main(monkeypatch, mdapi, "--daemon")
+
+    assert calls == [TOKENS]
+    assert "Hello someone!" in capsys.readouterr().out
+
+
+def test_daemon_exits_when_login_fails(mdapi, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mdapi, "get_token", lambda: None)
+    monkeypatch.setattr(mdapi, "run_daemon", calls.append)
+
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, mdapi, "--daemon")
+    assert calls == []
+
+
+@pytest.fixture
+def shard_worker(mdapi, monkeypatch, tmp_path):
+    """mdapi with a 3-day range, local lease/plan folders and the network calls stubbed out."""
+    monkeypatch.setattr(mdapi, "startTime", "2024-01-02")
+    monkeypatch.setattr(mdapi, "endTime", "2024-01-04")
+    monkeypatch.setattr(mdapi, "shard_days", 1)
+    monkeypatch.setattr(mdapi, "shard_coordinator", str(tmp_path / "leases"))
+    monkeypatch.setattr(mdapi, "plan_dir", str(tmp_path / "plans"))
+    monkeypatch.setattr(mdapi, "get_token", lambda: (dict(TOKENS), "someone"))
+
+    def fetch_search_totals(plan):
+        plan.set_totals(2, 1.0, 2)
+        return 2, 1.0, 2
+    monkeypatch.setattr(mdapi, "fetch_search_totals", fetch_search_totals)
+
+    failing_days = set()
+
+    def fetch_and_download_data(total_files, access_token, refresh_token, plan, heartbeat=None):
+        day = plan.query["startTime"]
+        plan.add_page([{"id": f"{day}-{i}", "identifier": f"{day}-{i}.h5"} for i in range(total_files)])
+        for i, entry in enumerate(plan.entries):
+            failed = day in failing_days and i == 0
+            plan.mark(entry["id"], mdapi.FAILED if failed else mdapi.DONE)
+        return True, total_files, 0
+    monkeypatch.setattr(mdapi, "fetch_and_download_data", fetch_and_download_data)
+    return mdapi, failing_days
+
+
+def shards_of(mdapi):
+    shards = mdapi.make_shards(mdapi.datasetId, mdapi.startTime, mdapi.endTime, mdapi.shard_days)
+    return shards, mdapi.open_store(mdapi.shard_coordinator)
+
+
+def test_shard_worker_completes_every_shard(shard_worker, monkeypatch, capsys):
+    mdapi, _ = shard_worker
+
+    run_main(monkeypatch, mdapi, "--shard-worker")
+
+    shards, store = shards_of(mdapi)
+    assert len(shards) == 3
+    assert store.all_done(shards)
+    assert "All 3 Shards are Done." in capsys.readouterr().out
+
+
+def test_shard_with_failed_files_stays_pending(shard_worker, monkeypatch):
+    mdapi, failing_days = shard_worker
+    failing_days.add("2024-01-03")
+
+    run_main(monkeypatch, mdapi, "--shard-worker")
+
+    shards, store = shards_of(mdapi)
+    done = {s["startTime"]: store.is_done(s["id"]) for s in shards}
+    assert done == {"2024-01-02": True, "2024-01-03": False, "2024-01-04": True}
+    # Released, so another worker can claim it and retry the failed file
+    assert store.claim(shards, "other-worker")["startTime"] == "2024-01-03"
+
+
+class FakeSearch:
+    """Stands in for requests.get on the search endpoint, returning every entry on one page."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.queries = []
+
+    def __call__(self, url, params=None, timeout=None):
+        self.queries.append(dict(params))
+        page = {"entries": self.entries if params["startIndex"] == 1 else [], "totalResults": len(self.entries)}
+        return type("Response", (), {"json": lambda self: page, "raise_for_status": lambda self: None})()
+
+
+def test_daemon_poll_skips_entries_pruned_from_seen(mdapi, monkeypatch, tmp_path):
+    monkeypatch.setattr(mdapi, "lookback_hours", 6)
+    monkeypatch.setattr(mdapi, "daemon_state_file", str(tmp_path / "daemon_state.json"))
+    early = {"id": "early", "identifier": "early.h5", "updated": "2024-01-02T01:00:00Z"}
+    late = {"id": "late", "identifier": "late.h5", "updated": "2024-01-02T20:00:00Z"}
+    search = FakeSearch([early, late])
+    monkeypatch.setattr(mdapi.requests, "get", search)
+
+    state = {"last_updated": "", "seen": {}}
+    mdapi.remember_entry(state, early)
+    mdapi.remember_entry(state, late)
+    assert state["seen"] == {"late": late["updated"]}
+
+    # The date-only query starts at midnight and lists 'early' again, which must not be downloaded twice
+    assert mdapi.poll_new_entries(state) == []
+    assert search.queries[0]["startTime"] == "2024-01-02"
+
+    newer = {"id": "newer", "identifier": "newer.h5", "updated": "2024-01-02T21:00:00Z"}
+    search.entries.append(newer)
+    assert mdapi.poll_new_entries(state) == [newer]
+
+
+def test_download_stops_once_the_lease_is_lost(mdapi, monkeypatch, tmp_path):
+    monkeypatch.setattr(mdapi, "plan_dir", str(tmp_path / "plans"))
+    monkeypatch.setattr(mdapi, "skip_user_input", True)
+    monkeypatch.setattr(mdapi.requests, "get", lambda *args, **kwargs: None)
+    plan = mdapi.DownloadPlan(mdapi.plan_dir, {"startTime": "2024-01-02"})
+    plan.set_totals(3, 1.0, 3)
+    plan.add_page([{"id": str(i), "identifier": f"{i}.h5", "updated": "2024-01-02T00:00:00Z"} for i in range(3)])
+    monkeypatch.setattr(mdapi, "build_download_plan", lambda plan, total_files: True)
+
+    heartbeat = type("Heartbeat", (), {"lost": False})()
+    downloaded = []
+
+    def download_with_refresh(tokens, record_id, *args):
+        downloaded.append(record_id)
+        heartbeat.lost = True  # Another worker takes the shard over during the first file
+        return None
+    monkeypatch.setattr(mdapi, "download_with_refresh", download_with_refresh)
+
+    mdapi.fetch_and_download_data(3, "access", "refresh", plan, heartbeat)
+
+    assert downloaded == ["0"]
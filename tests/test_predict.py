@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML_MODEL"))
+
+from predict import latest_rows
+
+
+def test_latest_rows_ignore_unparseable_times():
+    df = pd.DataFrame({"Station": ["Eloor", "Eloor", "Eloor", "Kollam"],
+                       "From Date": ["01-01-2024 05:00", "not a date", "01-01-2024 06:00", "not a date"],
+                       "PM2.5": [10.0, 20.0, 30.0, 40.0]})
+
+    latest = latest_rows(df, "Station", "From Date")
+
+    # A station whose times all fail to parse still keeps a row
+    assert latest["PM2.5"].tolist() == [30.0, 40.0]
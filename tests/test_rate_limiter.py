@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+import threading
+
+MOSDAC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION", "SATELLITE-DATA",
+                          "mosdac-api")
+sys.path.insert(0, MOSDAC_DIR)
+
+from rate_limiter import QuotaLimiter
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+
+def test_acquire_does_not_hold_the_lock_while_waiting(tmp_path):
+    limiter = QuotaLimiter(str(tmp_path / "quota_state.json"), per_minute=60, safety=1.0)
+    limiter.acquire()  # uses the only token, the next one refills in a second
+
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    time.sleep(0.1)
+
+    # record() needs the lock; it must not wait for the other thread's sleep to end
+    t0 = time.perf_counter()
+    limiter.record(Response())
+    assert time.perf_counter() - t0 < 0.2
+
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert limiter.used_today == 2
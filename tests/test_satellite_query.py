@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION", "SATELLITE-DATA"))
+
+from insat3d import SATELLITE_COLUMNS, calibrate
+from satellite_query import SatelliteArchive
+
+ROWS, COLS, FILL = 50, 37, 1023
+GRANULE = "3RIMG_01JAN2024_0015_L1C_SGP_V01R00.h5"
+
+
+@pytest.fixture
+def granule(tmp_path):
+    """Small granule with every count dataset and LUT; its sides are not multiples of the tile size."""
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / GRANULE)
+    with h5py.File(path, "w") as f:
+        for count_name, lut_name in SATELLITE_COLUMNS.values():
+            if count_name not in f:
+                counts = rng.integers(0, FILL, size=(1, ROWS, COLS), dtype=np.uint16)
+                counts[0, :, :2] = FILL
+                f.create_dataset(count_name, data=counts).attrs["_FillValue"] = np.uint16(FILL)
+            f.create_dataset(lut_name, data=rng.uniform(0, 300, FILL + 1).astype(np.float32))
+    return path
+
+
+@pytest.mark.parametrize("window", [(0, ROWS, 0, COLS), (3, 19, 5, 6), (15, 17, 15, 17), (40, 50, 30, 37)])
+def test_read_window_matches_a_direct_slice(granule, window):
+    row0, row1, col0, col1 = window
+    with SatelliteArchive(os.path.dirname(granule), tile_size=16) as archive, h5py.File(granule, "r") as f:
+        for band, (count_name, lut_name) in SATELLITE_COLUMNS.items():
+            expected = calibrate(f[count_name][0, row0:row1, col0:col1], f[lut_name][()], FILL)
+            np.testing.assert_array_equal(archive.read_window(granule, band, window), expected)
+
+
+def test_bands_of_one_count_dataset_share_its_tiles(granule):
+    with SatelliteArchive(os.path.dirname(granule), tile_size=16) as archive:
+        archive.read_window(granule, "TIR1_TEMP", (0, ROWS, 0, COLS))
+        misses = archive.cache.misses
+        archive.read_window(granule, "TIR1_RADIANCE", (0, ROWS, 0, COLS))
+        # Only the TIR1 radiance LUT is new
+        assert archive.cache.misses == misses + 1
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import threading
+
+MOSDAC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DATA-COLLECTION", "SATELLITE-DATA",
+                          "mosdac-api")
+sys.path.insert(0, MOSDAC_DIR)
+
+from shard_coordinator import FileLeaseStore
+
+SHARD = {"id": "3RIMG_L1C_SGP_20240102_20240102", "startTime": "2024-01-02", "endTime": "2024-01-02"}
+
+
+def expire(store, shard_id):
+    store.lease_seconds = -1
+    store._write_lease(shard_id, store._read_lease(shard_id)["owner"])
+    store.lease_seconds = 1800
+
+
+def test_late_renew_and_release_leave_a_stolen_lease_alone(tmp_path):
+    store = FileLeaseStore(str(tmp_path))
+    assert store.claim([SHARD], "old") == SHARD
+    expire(store, SHARD["id"])
+    assert store.claim([SHARD], "new") == SHARD
+
+    assert not store.renew(SHARD["id"], "old")
+    store.release(SHARD["id"], "old")
+    assert store._read_lease(SHARD["id"])["owner"] == "new"
+
+
+def test_renew_waits_for_the_steal_lock(tmp_path):
+    store = FileLeaseStore(str(tmp_path))
+    store.claim([SHARD], "old")
+    lock_path = store._path(SHARD["id"], "steal")
+    open(lock_path, "w").close()  # A steal in progress
+
+    renewed = []
+    renewer = threading.Thread(target=lambda: renewed.append(store.renew(SHARD["id"], "old")))
+    renewer.start()
+    time.sleep(0.2)
+    assert renewed == []
+
+    # The steal finishes: the lease is now someone else's, so the renew must fail
+    store._write_lease(SHARD["id"], "new")
+    os.remove(lock_path)
+    renewer.join(timeout=5)
+    assert renewed == [False]
+    assert store._read_lease(SHARD["id"])["owner"] == "new"
+
+
+def test_stale_steal_lock_is_reclaimed(tmp_path):
+    store = FileLeaseStore(str(tmp_path))
+    store.claim([SHARD], "old")
+    expire(store, SHARD["id"])
+    lock_path = store._path(SHARD["id"], "steal")
+    open(lock_path, "w").close()
+    old = time.time() - 2 * store.STALE_LOCK_SECONDS
+    os.utime(lock_path, (old, old))
+
+    assert store.claim([SHARD], "new") == SHARD
+    assert sorted(os.listdir(tmp_path)) == [f"{SHARD['id']}.lease"]